@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+"""Import time benchmark for strconv.
+
+Times `import strconv` in fresh interpreters and exits with status 1 when
+the median exceeds the budget or when an optional or heavy dependency is
+imported eagerly:
+
+    python benchmarks/bench_import.py --budget 20
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+# Modules strconv should only import when they are needed
+LAZY_MODULES = ('dateutil', 'numpy', 'concurrent.futures.process')
+
+SCRIPT = '''
+import json, sys, time
+t0 = time.perf_counter()
+import strconv
+elapsed = time.perf_counter() - t0
+print(json.dumps({
+    'seconds': elapsed,
+    'eager': [m for m in %r if m in sys.modules],
+}))
+''' % (LAZY_MODULES,)
+
+
+def measure(repeat=10):
+    """Returns the import times in seconds of `repeat` fresh interpreters
+    and the lazy modules that were imported eagerly. A first untimed run
+    writes the bytecode cache so compiling the source is not measured."""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    times = []
+    eager = set()
+    for i in range(repeat + 1):
+        out = subprocess.check_output([sys.executable, '-c', SCRIPT],
+                                      env=env, cwd=ROOT)
+        result = json.loads(out.decode('utf-8'))
+        if not i:
+            continue
+        times.append(result['seconds'])
+        eager.update(result['eager'])
+    return times, sorted(eager)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--budget', type=float, default=20,
+                        help='maximum median import time in milliseconds')
+    args = parser.parse_args(argv)
+
+    times, eager = measure(args.repeat)
+    median = statistics.median(times) * 1000
+    print('import strconv: {0:.1f} ms median, {1:.1f} ms min '
+          '(budget {2:.1f} ms)'.format(median, min(times) * 1000,
+                                       args.budget))
+    status = 0
+    if median > args.budget:
+        print('over budget')
+        status = 1
+    if eager:
+        print('imported eagerly: {0}'.format(', '.join(eager)))
+        status = 1
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+"""Throughput and memory benchmarks for strconv.
+
+Runs every converter and the convert/infer entry points over reproducible
+synthetic datasets and reports values per second and peak memory. Results
+can be saved as JSON and compared against a stored baseline:
+
+    python benchmarks/bench_strconv.py --output results.json
+    python benchmarks/bench_strconv.py --baseline results.json
+
+The comparison exits with status 1 when a benchmark is slower than the
+baseline by more than the tolerance.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+import strconv  # noqa: E402
+
+
+# Datasets
+
+def numeric(rng, n):
+    values = []
+    for _ in range(n):
+        if rng.random() < 0.5:
+            values.append(str(rng.randint(-10 ** 6, 10 ** 6)))
+        else:
+            values.append('{0:.4f}'.format(rng.uniform(-1e4, 1e4)))
+    return values
+
+
+def boolean(rng, n):
+    tokens = ('true', 'false', 't', 'f', 'yes', 'no', 'TRUE', 'False')
+    return [rng.choice(tokens) for _ in range(n)]
+
+
+def dates(rng, n):
+    formats = ('%Y-%m-%d', '%d/%m/%Y', '%b %d, %Y', '%Y-%m-%d %H:%M:%S',
+               '%d.%m.%Y %H:%M', '%I:%M %p')
+    start = datetime(2000, 1, 1)
+    values = []
+    for _ in range(n):
+        dt = start + timedelta(seconds=rng.randint(0, 20 * 365 * 86400))
+        values.append(dt.strftime(rng.choice(formats)))
+    return values
+
+
+def adversarial(rng, n):
+    # Strings that no converter accepts and that fall through to string
+    letters = 'abcdeghijkmopqrsuvwxz'
+    return [''.join(rng.choice(letters) for _ in range(rng.randint(6, 12)))
+            for _ in range(n)]
+
+
+def mixed(rng, n):
+    generators = (numeric, boolean, dates, adversarial)
+    values = []
+    for _ in range(n):
+        if rng.random() < 0.1:
+            values.append(rng.choice(('', 'None', None)))
+        else:
+            values.extend(rng.choice(generators)(rng, 1))
+    return values
+
+
+def wide(rng, n, width=200):
+    generators = (numeric, boolean, dates, adversarial)
+    columns = [generators[j % len(generators)](rng, n // width or 1)
+               for j in range(width)]
+    return [list(row) for row in zip(*columns)]
+
+
+DATASETS = {
+    'numeric': numeric,
+    'boolean': boolean,
+    'dates': dates,
+    'adversarial': adversarial,
+    'mixed': mixed,
+}
+
+
+# Benchmarks
+
+def _each(func):
+    def run(values):
+        for s in values:
+            try:
+                func(s)
+            except ValueError:
+                pass
+    return run
+
+
+def _consume(method):
+    def run(values):
+        for _ in method(values):
+            pass
+    return run
+
+
+def benchmarks():
+    """Returns (name, dataset, function) triples. The function is called
+    with the dataset and the number of values it processes is the size of
+    the dataset (cells for matrices)."""
+    s = strconv.default_strconv
+    benches = []
+
+    for name in DATASETS:
+        benches.extend([
+            ('convert/' + name, name, _each(s.convert)),
+            ('convert_series/' + name, name, _consume(s.convert_series)),
+            ('infer_series/' + name, name, s.infer_series),
+        ])
+
+    converters = {
+        'convert_none': 'mixed',
+        'convert_int': 'numeric',
+        'convert_float': 'numeric',
+        'convert_bool': 'boolean',
+        'convert_time': 'dates',
+        'convert_datetime': 'dates',
+        'convert_date': 'dates',
+    }
+    for func, dataset in sorted(converters.items()):
+        func = getattr(strconv, func)
+        benches.append(('{0}/{1}'.format(func.__name__, dataset), dataset,
+                        _each(func)))
+        benches.append(('{0}/adversarial'.format(func.__name__),
+                        'adversarial', _each(func)))
+
+    benches.extend([
+        ('convert_matrix/wide', 'wide', _consume(s.convert_matrix)),
+        ('infer_matrix/wide', 'wide', s.infer_matrix),
+    ])
+    return benches
+
+
+def _size(data):
+    if data and isinstance(data[0], list):
+        return sum(len(row) for row in data)
+    return len(data)
+
+
+def run(size=10000, seed=0, repeat=3, only=None):
+    datasets = {}
+    for name, generate in DATASETS.items():
+        datasets[name] = generate(random.Random(seed), size)
+    datasets['wide'] = wide(random.Random(seed), size)
+
+    results = {}
+    for name, dataset, func in benchmarks():
+        if only and only not in name:
+            continue
+        data = datasets[dataset]
+        count = _size(data)
+
+        best = None
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            func(data)
+            elapsed = time.perf_counter() - t0
+            if best is None or elapsed < best:
+                best = elapsed
+
+        tracemalloc.start()
+        func(data)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        results[name] = {
+            'values': count,
+            'seconds': best,
+            'values_per_sec': count / best if best else float('inf'),
+            'peak_bytes': peak,
+        }
+        print('{0:<36} {1:>14,.0f} values/s {2:>12,d} B peak'.format(
+            name, results[name]['values_per_sec'], peak))
+
+    return {
+        'python': platform.python_version(),
+        'strconv': strconv.__version__,
+        'size': size,
+        'seed': seed,
+        'results': results,
+    }
+
+
+def compare(current, baseline, tolerance=0.2):
+    """Prints the speed ratio of each benchmark against the baseline and
+    returns the names of those slower by more than `tolerance`."""
+    regressions = []
+    for name, result in sorted(current['results'].items()):
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        ratio = result['values_per_sec'] / base['values_per_sec']
+        flag = ''
+        if ratio < 1 - tolerance:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print('{0:<36} {1:>6.2f}x{2}'.format(name, ratio, flag))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--size', type=int, default=10000,
+                        help='values per dataset')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='timed runs per benchmark, the best is kept')
+    parser.add_argument('--only', help='run benchmarks containing this')
+    parser.add_argument('--output', help='write the results as JSON')
+    parser.add_argument('--baseline', help='compare with stored results')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed slowdown against the baseline')
+    args = parser.parse_args(argv)
+
+    current = run(args.size, args.seed, args.repeat, args.only)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print()
+        if compare(current, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
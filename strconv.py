@@ -1,18 +1,56 @@
 # Copyright (c) 2013-2018 Byron Ruth
 # BSD License
 
+import csv
+import math
+import mmap
+import os
 import re
 import sys
-from collections import Counter
-from datetime import datetime
+import threading
+from array import array
+from collections import Counter, OrderedDict, deque, namedtuple
+from datetime import date, datetime, timedelta, timezone
+from functools import partial
+from itertools import islice, repeat
+from operator import itemgetter
+from random import Random
+from time import perf_counter_ns
 
 __version__ = '0.5'
 
+# strptime's own directive patterns are used to pre-screen formats. They
+# are internal, so `FormatEngine` falls back to plain strptime without them.
+try:
+    from _strptime import TimeRE, _getlang
+except ImportError:  # pragma: no cover
+    TimeRE = _getlang = None
+
+# NumPy is optional and only imported the first time it is needed
+_numpy_module = False
+
+
+def _numpy():
+    global _numpy_module
+    if _numpy_module is False:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _numpy_module = numpy
+    return _numpy_module
+
+
+# Number of distinct values sampled per type unless told otherwise
+DEFAULT_SAMPLE_SIZE = 10
+
 
 class TypeInfo(object):
     """Sampling and frequency of a type for a sample of values."""
 
-    def __init__(self, name, size=None, total=None):
+    __slots__ = ('name', 'count', 'sample', 'size', 'total', 'sample_set')
+
+    def __init__(self, name, size=DEFAULT_SAMPLE_SIZE, total=None):
         self.name = name
         self.count = 0
         self.sample = []
@@ -39,15 +77,107 @@ class TypeInfo(object):
             return self.count / float(self.total)
         return 0.
 
+    def merge(self, other):
+        """Adds the counts and samples of `other`, which is expected to
+        cover the values following the ones seen by this instance."""
+        self.count += other.count
+        for i, value in other.sample:
+            self.add(i, value)
+        if other.total is not None:
+            self.total = (self.total or 0) + other.total
+        return self
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'count': self.count,
+            'size': self.size,
+            'total': self.total,
+            'sample': [[i, value] for i, value in self.sample],
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        info = cls(d['name'], d.get('size', DEFAULT_SAMPLE_SIZE),
+                   d.get('total'))
+        info.count = d['count']
+        for i, value in d.get('sample', ()):
+            info.add(i, value)
+        return info
+
+
+# Type lattice: the type each type widens to. Types that are not listed
+# widen to string, the top, and none is below every type. Entries can be
+# added for custom types, e.g. `TYPE_PARENTS['number'] = 'float'`.
+TYPE_PARENTS = {
+    'bool': 'int',
+    'int': 'float',
+    'float': 'string',
+    'date': 'datetime',
+    'datetime': 'string',
+    'time': 'string',
+    'string': None,
+}
+
+
+def _type_chain(t):
+    while t is not None:
+        yield t
+        t = TYPE_PARENTS.get(t, 'string' if t != 'string' else None)
+
+
+def join_types(a, b):
+    """Returns the narrowest type of the lattice in `TYPE_PARENTS` that
+    both `a` and `b` widen to."""
+    if a == b or b == 'none':
+        return a
+    if a == 'none':
+        return b
+    chain = set(_type_chain(a))
+    for t in _type_chain(b):
+        if t in chain:
+            return t
+    return 'string'
+
+
+# Conversions of a value to the parent of its type in `TYPE_PARENTS`
+LIFTS = {
+    ('bool', 'int'): int,
+    ('int', 'float'): float,
+    ('date', 'datetime'): lambda d: datetime(d.year, d.month, d.day),
+}
+
+
+def lift(v, t, to):
+    """Converts the value `v` of type `t` to the wider type `to` along the
+    lattice with `LIFTS`, e.g. a date to a datetime at midnight. Returns
+    NOMATCH if `to` is not above `t` or a step has no conversion."""
+    for parent in islice(_type_chain(t), 1, None):
+        if t == to:
+            break
+        func = LIFTS.get((t, parent))
+        if func is None:
+            return NOMATCH
+        v, t = func(v), parent
+    return v if t == to else NOMATCH
+
 
 class Types(object):
-    """Type information for a sample of values."""
+    """Type information for a sample of values.
+
+    `widest` is the join in the type lattice of the types seen so far,
+    None before any. It is only updated when a type is first seen, so it
+    costs nothing per value.
+    """
+
+    __slots__ = ('size', 'total', 'types', 'ignore_nulls', 'widest')
 
-    def __init__(self, size=None, ignore_nulls=True):
+    def __init__(self, size=DEFAULT_SAMPLE_SIZE, ignore_nulls=True):
         self.size = size
         self.total = None
         self.types = {}
         self.ignore_nulls = ignore_nulls
+        self.widest = None
 
     def __repr__(self):
         if self.ignore_nulls:
@@ -57,11 +187,18 @@ class Types(object):
         label = ', '.join(['{0}={1}'.format(t, i) for t, i in types])
         return '<{0}: {1}>'.format(self.__class__.__name__, label)
 
+    def _widen(self, t):
+        if self.widest is None:
+            self.widest = t
+        else:
+            self.widest = join_types(self.widest, t)
+
     def incr(self, t, n=1):
         if t is None:
             t = 'string'
         if t not in self.types:
             self.types[t] = TypeInfo(t, self.size, self.total)
+            self._widen(t)
         self.types[t].incr(n)
 
     def add(self, t, i, value):
@@ -69,6 +206,7 @@ class Types(object):
             t = 'string'
         if t not in self.types:
             self.types[t] = TypeInfo(t, self.size, self.total)
+            self._widen(t)
         self.types[t].add(i, value)
 
     def set_total(self, total):
@@ -76,6 +214,49 @@ class Types(object):
         for k in self.types:
             self.types[k].total = total
 
+    def merge(self, other):
+        """Adds the type counts and samples of `other`, which is expected
+        to cover the values following the ones seen by this instance."""
+        for t, info in other.types.items():
+            if t not in self.types:
+                self.types[t] = TypeInfo(t, self.size, self.total)
+                self._widen(t)
+            self.types[t].merge(info)
+        if other.total is not None:
+            self.set_total((self.total or 0) + other.total)
+        return self
+
+    def to_dict(self):
+        """Returns the state as a dict of plain values. Together with
+        `from_dict` it allows inference to be resumed later, see
+        `Strconv.infer_series`."""
+        return {
+            'size': self.size,
+            'total': self.total,
+            'ignore_nulls': self.ignore_nulls,
+            'types': [info.to_dict() for info in self.types.values()],
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        types = cls(d.get('size', DEFAULT_SAMPLE_SIZE),
+                    d.get('ignore_nulls', True))
+        types.total = d.get('total')
+        for info in d['types']:
+            info = TypeInfo.from_dict(info)
+            types.types[info.name] = info
+            types._widen(info.name)
+        return types
+
+    def to_bytes(self):
+        """Returns the state as compressed JSON. Samples must be JSON
+        serializable."""
+        return _pack(self.to_dict())
+
+    @classmethod
+    def from_bytes(cls, data):
+        return cls.from_dict(_unpack(data))
+
     def most_common(self, n=None):
         if n is None:
             n = len(self.types)
@@ -84,83 +265,1160 @@ class Types(object):
             c[t] = self.types[t].count
         return c.most_common(n)
 
-    def inferred_col_type(self):
-        c = Counter()
-        for t in self.types:
-            c[t] = self.types[t].count
-        if c.most_common()[0][0] == 'none':
-            try:
-                if c.most_common()[1][0] == 'int' and 'float' in c:
-                    return [('float', c['float'])]
-                return [c.most_common()[1]]
-            except IndexError:
-                return [('empty', c.most_common()[0][1])]
+    def inferred_col_type(self, outliers=False):
+        """Returns `[(type, count)]` for the `widest` type of the column,
+        ignoring nulls. The count is the number of values of that type, or
+        of all non-null values for a string column, such as one of ints
+        and dates, or a widest type that was not seen itself. A column of
+        nulls is 'empty' with the number of nulls.
+
+        With `outliers`, strings no converter accepted do not widen the
+        column unless they outnumber the other non-null values, so a few
+        stray strings leave it typed. They are then conversion errors.
+        """
+        strings = self.types.get('string')
+        strings = strings.count if strings is not None else 0
+        typed = sum(info.count for t, info in self.types.items()
+                    if t not in ('none', 'string'))
+
+        widest = self.widest
+        if outliers and strings and strings <= typed:
+            widest = None
+            for t in self.types:
+                if t != 'string':
+                    widest = t if widest is None else join_types(widest, t)
+
+        if widest is None or widest == 'none':
+            info = self.types.get('none')
+            return [('empty', info.count if info else 0)]
+        if widest == 'string':
+            return [('string', strings + typed)]
+        info = self.types.get(widest)
+        return [(widest, info.count if info is not None else typed)]
+
+
+def _pack(obj):
+    import json
+    import zlib
+    data = json.dumps({'version': 1, 'data': obj}, separators=(',', ':'))
+    return zlib.compress(data.encode('utf-8'))
+
+
+def _unpack(data):
+    import json
+    import zlib
+    obj = json.loads(zlib.decompress(data).decode('utf-8'))
+    if obj.get('version') != 1:
+        raise ValueError('unsupported format version: {0}'.format(
+            obj.get('version')))
+    return obj['data']
+
+
+def dump_types(types):
+    """Serializes a `Types` or the list of them returned by
+    `infer_matrix` to bytes."""
+    if isinstance(types, Types):
+        return types.to_bytes()
+    return _pack([info.to_dict() for info in types])
+
+
+def load_types(data):
+    """Inverse of `dump_types`."""
+    obj = _unpack(data)
+    if isinstance(obj, list):
+        return [Types.from_dict(d) for d in obj]
+    return Types.from_dict(obj)
+
+
+def _resume(types, infos):
+    # Merges the column infos of newly inferred rows into the previous
+    # state, which is updated in place.
+    for j, info in enumerate(infos):
+        if j < len(types):
+            types[j].merge(info)
+        else:
+            types.append(info)
+    return types
+
+
+def _type_names(types):
+    # Names of the column types given as `Types`, as returned by
+    # `infer_matrix`, or as names
+    names = []
+    for t in types:
+        if isinstance(t, Types):
+            t = t.inferred_col_type(outliers=True)[0][0]
+        elif t is None:
+            t = 'string'
+        names.append(t)
+    return names
+
+
+class TypeMatrix(object):
+    """Type counts of every column of a matrix in one integer array.
+
+    Counts are stored in an `array('q')` indexed by `[column, type id]`,
+    next to the index of the row each type was first seen in, so wide
+    tables do not need a `Types` and `TypeInfo` object per column. Samples
+    are only kept when `size` is non-zero. Indexing or iterating returns
+    `Types` objects built on demand.
+    """
+
+    __slots__ = ('width', 'names', 'ids', 'counts', 'firsts', 'size',
+                 'samples', 'totals')
+
+    def __init__(self, width, names=(), size=0):
+        self.width = width
+        self.names = []
+        self.ids = {}
+        self.counts = array('q')
+        self.firsts = array('q')
+        self.size = size
+        self.samples = {}
+        self.totals = array('q', [0]) * width
+        for t in names:
+            self.type_id(t)
+
+    def __repr__(self):
+        return '<{0}: {1} columns>'.format(self.__class__.__name__,
+                                           self.width)
+
+    def __len__(self):
+        return self.width
+
+    def __getitem__(self, j):
+        if not 0 <= j < self.width:
+            raise IndexError('column index out of range')
+        return self.types(j)
+
+    def __iter__(self):
+        for j in range(self.width):
+            yield self.types(j)
+
+    def type_id(self, t):
+        if t is None:
+            t = 'string'
+        tid = self.ids.get(t)
+        if tid is None:
+            # Widen every column by one slot for the new type
+            stride = len(self.names)
+            counts = array('q')
+            firsts = array('q')
+            for j in range(self.width):
+                counts.extend(self.counts[j * stride:(j + 1) * stride])
+                counts.append(0)
+                firsts.extend(self.firsts[j * stride:(j + 1) * stride])
+                firsts.append(-1)
+            self.counts = counts
+            self.firsts = firsts
+            tid = self.ids[t] = stride
+            self.names.append(t)
+        return tid
+
+    def incr(self, j, t, i, n=1):
+        """Counts `n` values of type `t` in column `j`, the first of which
+        is in row `i`."""
+        tid = self.type_id(t)
+        k = j * len(self.names) + tid
+        self.counts[k] += n
+        if self.firsts[k] < 0 or i < self.firsts[k]:
+            self.firsts[k] = i
+
+    def add(self, j, t, i, value):
+        if not self.size:
+            return
+        tid = self.type_id(t)
+        info = self.samples.get((j, tid))
+        if info is None:
+            info = self.samples[j, tid] = TypeInfo(self.names[tid],
+                                                   self.size)
+        info.add(i, value)
+
+    def count(self, j, t):
+        tid = self.ids.get('string' if t is None else t)
+        if tid is None:
+            return 0
+        return self.counts[j * len(self.names) + tid]
+
+    def set_total(self, j, total):
+        self.totals[j] = total
+
+    def types(self, j):
+        """Returns the `Types` of column `j`."""
+        stride = len(self.names)
+        info = Types(size=self.size)
+        seen = [(self.firsts[j * stride + tid], tid) for tid in range(stride)
+                if self.counts[j * stride + tid]]
+        for _, tid in sorted(seen):
+            t = self.names[tid]
+            info.types[t] = ti = TypeInfo(t, self.size)
+            info._widen(t)
+            ti.count = self.counts[j * stride + tid]
+            sample = self.samples.get((j, tid))
+            if sample is not None:
+                ti.sample = sample.sample
+                ti.sample_set = sample.sample_set
+        info.set_total(self.totals[j])
+        return info
+
+
+# Array typecodes for the column types that have a compact representation
+COLUMN_TYPECODES = {
+    'int': 'q',
+    'float': 'd',
+    'bool': 'b',
+}
+
+
+class Column(object):
+    """Converted values of a single column.
+
+    Values of int, float and bool columns are stored in an `array.array`
+    (or a NumPy array), with zero in the null slots. Other types are kept
+    in a list. `nulls` is a bitmap with bit `i` set when row `i` is null
+    (a `bytearray`, or a boolean NumPy array). `errors` holds the indexes
+    of the values that did not fit the column type. These are stored as
+    nulls.
+    """
+
+    def __init__(self, type, values, nulls, errors=(), info=None):
+        self.type = type
+        self.values = values
+        self.nulls = nulls
+        self.errors = list(errors)
+        self.info = info
+
+    def __repr__(self):
+        return '<{0}: {1} n={2}>'.format(self.__class__.__name__,
+                                         self.type, len(self))
+
+    def __len__(self):
+        return len(self.values)
+
+    def is_null(self, i):
+        if isinstance(self.nulls, bytearray):
+            return bool(self.nulls[i >> 3] & (1 << (i & 7)))
+        return bool(self.nulls[i])
+
+    def tolist(self):
+        values = self.values
+        if not isinstance(values, list):
+            values = values.tolist()
+        if self.type == 'bool':
+            values = [bool(v) for v in values]
+        return [None if self.is_null(i) else v
+                for i, v in enumerate(values)]
+
+
+def _bitmap(flags):
+    bits = bytearray((len(flags) + 7) >> 3)
+    for i, flag in enumerate(flags):
+        if flag:
+            bits[i >> 3] |= 1 << (i & 7)
+    return bits
+
+
+# Array typecodes of the column types stored in shared memory. Dates and
+# times are stored as integers, see `SharedColumns`.
+SHARED_TYPECODES = dict(COLUMN_TYPECODES, datetime='q', date='q', time='q')
+
+_epoch = datetime(1970, 1, 1)
+_epoch_utc = _epoch.replace(tzinfo=timezone.utc)
+_epoch_ordinal = _epoch.toordinal()
+_microsecond = timedelta(microseconds=1)
+
+# One byte per bit of each possible bitmap byte, lowest bit first
+_bitmap_bytes = [bytes((b >> k) & 1 for k in range(8)) for b in range(256)]
+
+
+def _unpack_bitmap(bits, n):
+    return b''.join([_bitmap_bytes[b] for b in bits])[:n]
+
+
+def _encode_temporal(t, v):
+    # Integer stored for a datetime, date or time value
+    if t == 'datetime':
+        if v.tzinfo is None:
+            return (v - _epoch) // _microsecond
+        return (v - _epoch_utc) // _microsecond
+    if t == 'date':
+        return v.toordinal() - _epoch_ordinal
+    return (((v.hour * 60 + v.minute) * 60 + v.second) * 1000000 +
+            v.microsecond)
+
+
+def _decode_temporal(t, v):
+    if t == 'datetime':
+        return _epoch + v * _microsecond
+    if t == 'date':
+        return date.fromordinal(v + _epoch_ordinal)
+    return (_epoch + v * _microsecond).time()
+
+
+class SharedColumns(object):
+    """Columns converted by `convert_matrix_shared`, held in a single
+    `multiprocessing.shared_memory` block.
+
+    Each item is a `Column` whose values and nulls are views of the block,
+    NumPy arrays if NumPy is installed and memoryviews otherwise. Nulls
+    are one byte per row. int, float and bool columns hold the values
+    themselves, datetime columns the microseconds since 1970-01-01 (UTC
+    for aware datetimes), date columns the days since 1970-01-01 and time
+    columns the microseconds since midnight. `tolist` decodes them. Other
+    column types are plain lists.
+
+    The views are only valid until `close` is called. The block outlives
+    the process until `unlink` is called, which the context manager does.
+    """
+
+    def __init__(self, block, layout, length, objects=None, errors=None,
+                 use_numpy=None):
+        self.block = block
+        self.name = block.name
+        self.layout = layout
+        self.length = length
+        self.types = [t for t, _, _, _ in layout]
+        self.columns = []
+        self._views = []
+
+        np = _numpy() if use_numpy is not False else None
+        for j, (t, typecode, offset, nulls_offset) in enumerate(layout):
+            if typecode is not None:
+                values = self._view(np, typecode, offset, length)
+            else:
+                values = (objects or {}).get(j) or [None] * length
+            nulls = self._view(np, '?', nulls_offset, length)
+            self.columns.append(Column(t, values, nulls,
+                                       (errors or {}).get(j, ())))
+
+    def _view(self, np, typecode, offset, n):
+        if np is not None:
+            # Bools are stored as one byte like NumPy's
+            return np.frombuffer(self.block.buf,
+                                 dtype='?' if typecode == 'b' else typecode,
+                                 count=n, offset=offset)
+        size = array('B' if typecode == '?' else typecode).itemsize
+        view = self.block.buf[offset:offset + n * size]
+        self._views.append(view)
+        view = view.cast('B' if typecode == '?' else typecode)
+        self._views.append(view)
+        return view
+
+    def __repr__(self):
+        return '<{0}: {1} columns n={2} {3!r}>'.format(
+            self.__class__.__name__, len(self.columns), self.length,
+            self.name)
+
+    def __len__(self):
+        return len(self.columns)
+
+    def __getitem__(self, j):
+        return self.columns[j]
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        self.unlink()
+
+    def tolist(self, j):
+        """Returns the values of column `j` as Python objects, with None
+        for nulls."""
+        column = self.columns[j]
+        if column.type not in ('datetime', 'date', 'time'):
+            return column.tolist()
+        return [None if v is None else _decode_temporal(column.type, v)
+                for v in column.tolist()]
+
+    def close(self):
+        """Releases the views and closes this process' handle of the
+        block. NumPy arrays taken from the columns must be dropped
+        first."""
+        for column in self.columns:
+            if column.values is not None and \
+                    not isinstance(column.values, list):
+                column.values = None
+            column.nulls = None
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self.block.close()
+
+    def unlink(self):
+        """Frees the block once every process has closed it."""
+        self.block.unlink()
+
+
+# Values are checked with NumPy this many at a time. Smaller inputs are not
+# worth the array overhead unless vectorization is requested explicitly.
+VECTOR_CHUNK_SIZE = 65536
+VECTOR_MIN_SIZE = 1024
+
+# Type names for the codes returned by `_vector_classify`
+_vector_types = ('none', 'int', 'float', 'bool')
+
+# Longer strings are left to the scalar converters to bound array memory
+_vector_max_len = 32
+
+# Whitespace `int` and `float` strip. Unlike `str.strip`, they keep the
+# information separators '\x1c' to '\x1f'.
+_number_space = ('\t\n\x0b\x0c\r \x85\xa0\u1680\u2000\u2001\u2002\u2003'
+                 '\u2004\u2005\u2006\u2007\u2008\u2009\u200a\u2028\u2029'
+                 '\u202f\u205f\u3000')
+
+
+def _vector_classify(np, values, k):
+    """Classifies values against the rules of the first `k` built-in
+    converters using array operations.
+
+    Returns an int8 array with the index into `_vector_types` of each
+    value, or -1 where the rules alone cannot decide, and a boolean array
+    that is true for the bool values that are true. Only values that the
+    scalar converters would certainly accept (and no earlier converter
+    would) are decided.
+    """
+    n = len(values)
+    # NumPy drops trailing NULs, also once stripping exposes them, so
+    # values with any NUL are left undecided as well
+    strs = np.array([v if type(v) is str and len(v) <= _vector_max_len and
+                     '\x00' not in v else '#' for v in values] or [''],
+                    dtype=str)[:n]
+    nones = np.fromiter((v is None for v in values), bool, n)
+
+    codes = np.full(n, -1, dtype=np.int8)
+    trues = np.zeros(n, dtype=bool)
+
+    nulls = nones | (strs == '') | (strs == 'None')
+    codes[nulls] = 0
+    rest = ~nulls
+
+    if k > 1:
+        stripped = np.char.strip(strs, _number_space)
+        signed = (np.char.startswith(stripped, '+') |
+                  np.char.startswith(stripped, '-'))
+        signs = np.char.count(stripped, '+') + np.char.count(stripped, '-')
+        body = np.char.lstrip(stripped, '+-')
+        # A single leading sign at most
+        sign_ok = signs == signed
+
+        ints = rest & sign_ok & np.char.isdecimal(body)
+        codes[ints] = 1
+        rest &= ~ints
+
+        if k > 2:
+            digits = np.char.replace(body, '.', '', 1)
+            floats = (rest & sign_ok & (np.char.count(body, '.') == 1) &
+                      np.char.isdecimal(digits))
+            codes[floats] = 2
+            rest &= ~floats
+
+    if k > 3:
+        lower = np.char.lower(strs)
+        trues = rest & np.isin(lower, ('t', 'true', 'yes'))
+        falses = rest & np.isin(lower, ('f', 'false', 'no'))
+        codes[trues | falses] = 3
+
+    return codes, trues
+
+
+# Bytes backend. The built-in none, int and float converters are decided
+# from the raw bytes where possible, only other cells are decoded. The
+# patterns cover exactly what `int` and `float` accept in ASCII.
+_bytes_space = rb'[\t-\r ]*'
+_bytes_digits = rb'\d+(?:_\d+)*'
+_bytes_int_re = re.compile(_bytes_space + rb'[+-]?' + _bytes_digits +
+                           _bytes_space)
+_bytes_float_re = re.compile(
+    _bytes_space + rb'[+-]?(?:' + _bytes_digits + rb'(?:\.(?:' +
+    _bytes_digits + rb')?)?|\.' + _bytes_digits + rb')(?:[eE][+-]?' +
+    _bytes_digits + rb')?' + _bytes_space)
+
+
+def _bytes_type(b, k, pos=0, endpos=None):
+    # Returns the type of b[pos:endpos] if one of the first `k` built-in
+    # converters decides it without decoding, None otherwise.
+    if endpos is None:
+        endpos = len(b)
+    if not k:
+        return None
+    if pos == endpos or (endpos - pos == 4 and b[pos:endpos] == b'None'):
+        return 'none'
+    if k > 1 and _bytes_int_re.fullmatch(b, pos, endpos):
+        return 'int'
+    if k > 2 and _bytes_float_re.fullmatch(b, pos, endpos):
+        return 'float'
+    return None
+
+
+# Character classes noted by `classify`
+CHAR_DIGIT = 1
+CHAR_ALPHA = 2
+CHAR_SPACE = 4
+CHAR_SIGN = 8
+CHAR_DOT = 16
+CHAR_COLON = 32
+CHAR_SLASH = 64
+CHAR_COMMA = 128
+CHAR_UNDERSCORE = 256
+CHAR_OTHER = 512
+
+_char_symbols = {
+    '+': CHAR_SIGN,
+    '-': CHAR_SIGN,
+    '.': CHAR_DOT,
+    ':': CHAR_COLON,
+    '/': CHAR_SLASH,
+    ',': CHAR_COMMA,
+    '_': CHAR_UNDERSCORE,
+}
+
+
+def _classify_char(c):
+    if c.isdecimal():
+        return CHAR_DIGIT
+    if c.isalpha():
+        return CHAR_ALPHA
+    if c.isspace():
+        return CHAR_SPACE
+    return _char_symbols.get(c, CHAR_OTHER)
+
+
+_char_classes = {chr(i): _classify_char(chr(i)) for i in range(128)}
+
+
+def classify(s):
+    """Returns the bitmask of character classes present in `s`."""
+    mask = 0
+    for c in set(s):
+        mask |= _char_classes.get(c) or _classify_char(c)
+    return mask
+
+
+class _NoMatch(object):
+    __slots__ = ()
+
+    def __repr__(self):
+        return 'NOMATCH'
+
+    def __reduce__(self):
+        return 'NOMATCH'
+
+    def __bool__(self):
+        return False
 
-        if c.most_common()[0][0] == 'int' and 'float' in c:
-            return [('float', c['float'])]
-        return [c.most_common(1)[0]]
+
+# Returned by non-raising converters for strings they do not accept
+NOMATCH = _NoMatch()
+
+
+class _Adapter(object):
+    # Non-raising wrapper of a converter that raises ValueError
+    __slots__ = ('func',)
+
+    def __init__(self, func):
+        self.func = func
+
+    def __repr__(self):
+        return '<{0}: {1!r}>'.format(self.__class__.__name__, self.func)
+
+    def __call__(self, s):
+        try:
+            return self.func(s)
+        except ValueError:
+            return NOMATCH
+
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize',
+                                     'currsize'])
+
+
+class _Dispatch(object):
+    # Immutable snapshot of the converters in order, read by the search
+    # loop without locking. Registrations replace the whole snapshot.
+    __slots__ = ('order', 'funcs', 'may_match', 'candidates', 'prefix')
+
+    def __init__(self, order, funcs, may_match, prefix):
+        self.order = order
+        self.funcs = funcs
+        self.may_match = may_match
+        # Selections by `(mask, length)`, only valid for this snapshot
+        self.candidates = {}
+        self.prefix = prefix
+
+    def select(self, s):
+        mask = classify(s)
+        n = len(s)
+        key = (mask, n)
+        funcs = self.candidates.get(key)
+        if funcs is None:
+            funcs = tuple(f for f, may_match in zip(self.funcs,
+                                                    self.may_match)
+                          if may_match is None or may_match(mask, n))
+            # Long strings are rare enough to not be worth caching
+            if n < 64:
+                self.candidates[key] = funcs
+        return funcs
+
+    def split(self, widest):
+        # The converters of a column whose values widen to `widest`: those
+        # of types below it, which cannot widen it further, and the rest.
+        # Nulls are always checked first. Not cached here, the lattice
+        # may change between calls.
+        above = []
+        below = []
+        for t, func in self.funcs:
+            if t != 'none' and t != widest and \
+                    join_types(t, widest) == widest:
+                below.append((t, func))
+            else:
+                above.append((t, func))
+        return tuple(above), tuple(below)
 
 
 class Strconv(object):
-    def __init__(self, converters=()):
+    """Converts strings with the first registered converter that accepts
+    them.
+
+    Conversions read an immutable snapshot of the converters, which
+    registrations rebuild under a lock. An instance can therefore be
+    shared by threads while converters are registered, each conversion
+    seeing either the old or the new set of converters.
+    """
+
+    def __init__(self, converters=(), adaptive=False, prescreen=False,
+                 cache_size=None):
         self.converters = {}
+        self.formats = {}
+        self.adaptive = adaptive
+        self.prescreen = prescreen
         self._order = []
-
-        for name, func in converters:
+        self._funcs = {}
+        self._may_match = {}
+        self._raises = {}
+        self._profile = None
+        self._lock = threading.Lock()
+        self.set_cache(cache_size)
+
+        for converter in converters:
+            name, func = converter[:2]
             self.converters[name] = func
             self._order.append(name)
-
-    def register_converter(self, name, func, priority=None):
+            self._set_func(name, func, *converter[2:])
+        self._rebuild()
+
+    def _rebuild(self):
+        # Called with the lock held, or before the instance is shared
+        order = tuple(self._order)
+        funcs = tuple((t, self._funcs[t]) for t in order)
+        may_match = tuple(self._may_match.get(t) for t in order)
+        # Vocabularies ahead of the built-in converters are skipped by the
+        # bulk paths as long as no earlier built-in accepts their tokens.
+        prefix = 0
+        limit = len(_builtin_order)
+        for t in order:
+            func = self.converters[t]
+            if isinstance(func, Vocabulary):
+                limit = min(limit, max(prefix, func._overlap))
+                # Null tokens extending the none converter
+                if func.base is None:
+                    continue
+                func = func.base
+            if prefix == len(_builtin_order):
+                break
+            name, builtin = _builtin_order[prefix]
+            if t != name or func is not builtin:
+                break
+            prefix += 1
+        prefix = min(prefix, limit)
+        self._dispatch = _Dispatch(order, funcs, may_match, prefix)
+
+        # Replaced rather than cleared, so conversions still running with
+        # the old snapshot cannot fill the new cache.
+        if self._cache is not None:
+            self._cache = OrderedDict()
+        self._hits = self._misses = 0
+
+    def _set_func(self, name, func, may_match=None, raises=True):
+        if may_match is None:
+            may_match = getattr(func, 'may_match', None)
+        if may_match is None:
+            self._may_match.pop(name, None)
+        else:
+            self._may_match[name] = may_match
+        self._raises[name] = raises
+
+        # Converters are called through their non-raising form
+        try_func = func
+        if raises:
+            try_func = getattr(func, 'try_convert', None) or _Adapter(func)
+
+        # In adaptive mode, format based converters get their own
+        # instance-scoped format order to learn from.
+        self.formats.pop(name, None)
+        if self.adaptive and func in _adaptive_formats:
+            formats = AdaptiveFormats(_adaptive_formats[func]())
+            self.formats[name] = formats
+            try_func = partial(try_func, formats=formats)
+        self._funcs[name] = try_func
+
+    def __getstate__(self):
+        # Profiling stays in the process that enabled it
+        state = self.__dict__.copy()
+        state.pop('_search', None)
+        state.pop('_lock', None)
+        state['_profile'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _worker_state(self):
+        # What worker processes need to rebuild the instance with
+        # `_from_state`: the converters, settings and learned format
+        # orders, but none of the caches, snapshots or profiling.
+        with self._lock:
+            converters = [(t, self.converters[t], self._may_match.get(t),
+                           self._raises[t]) for t in self._order]
+        learned = {t: (dict(formats.hits), list(formats._learned))
+                   for t, formats in self.formats.items()}
+        return (self.__class__, converters, self.adaptive, self.prescreen,
+                self._cache_size, learned)
+
+    def copy(self, adaptive=None):
+        """Returns a new instance with the same converters. Learned format
+        orders are not copied, profiling stats are shared."""
+        if adaptive is None:
+            adaptive = self.adaptive
+        with self._lock:
+            converters = [(t, self.converters[t], self._may_match.get(t),
+                           self._raises[t]) for t in self._order]
+        other = self.__class__(converters=converters, adaptive=adaptive,
+                               prescreen=self.prescreen,
+                               cache_size=self._cache_size)
+        if self._profile is not None:
+            other._profile = self._profile
+            other._search = other._profiled_search
+        return other
+
+    def set_cache(self, maxsize):
+        """Memoizes up to `maxsize` conversions, evicting the least
+        recently used ones first. None disables the cache."""
+        self._cache_size = maxsize
+        self._cache = OrderedDict() if maxsize else None
+        self._hits = self._misses = 0
+
+    def cache_info(self):
+        return CacheInfo(self._hits, self._misses, self._cache_size,
+                         len(self._cache) if self._cache else 0)
+
+    def cache_clear(self):
+        if self._cache:
+            self._cache.clear()
+        self._hits = self._misses = 0
+
+    def enable_profiling(self, callback=None, every=1000):
+        """Records attempts, hits, misses, cumulative time and a latency
+        histogram per converter, and how many values fall through to
+        string. If given, `callback` is called with `profile_stats()`
+        after every `every` searched values. Values served from the cache
+        or decided by the NumPy backend are not searched."""
+        if every < 1:
+            raise ValueError('every must be at least 1')
+        if self._profile is None:
+            self._profile = Profile()
+        self._profile.callback = callback
+        self._profile.every = every
+        # Shadowing the method keeps the default search free of any
+        # profiling checks.
+        self._search = self._profiled_search
+
+    def disable_profiling(self):
+        self._profile = None
+        self.__dict__.pop('_search', None)
+
+    def profile_stats(self):
+        """Returns the profiling stats as a dict, or None if profiling is
+        not enabled."""
+        if self._profile is None:
+            return None
+        return self._profile.to_dict()
+
+    def reset_profile(self):
+        if self._profile is not None:
+            self._profile.reset()
+
+    def reset_formats(self):
+        """Forgets the format orders learned in adaptive mode."""
+        for formats in self.formats.values():
+            formats.reset()
+
+    def register_converter(self, name, func, priority=None, may_match=None,
+                           raises=True):
+        """Registers a converter for the type `name`.
+
+        Converters either raise `ValueError` for strings they do not accept
+        or, if `raises` is false, return `NOMATCH`. Raising converters are
+        called through their `try_convert` attribute when they have one,
+        which must follow the non-raising protocol, and are otherwise
+        wrapped to catch the error.
+
+        `may_match` is an optional cheap predicate taking the character
+        class mask from `classify` and the length of the string. When the
+        prescreen is enabled, the converter is skipped for strings the
+        predicate returns false for. It defaults to the `may_match`
+        attribute of `func`, if any.
+        """
         if name is None:
             raise ValueError('type name cannot be None')
         if not callable(func):
             raise ValueError('converter functions must be callable')
+        if may_match is not None and not callable(may_match):
+            raise ValueError('may_match must be callable')
 
-        self.converters[name] = func
-
-        if name in self._order:
-            self._order.remove(name)
-
-        if priority is not None and priority < len(self._order):
-            self._order.insert(priority, name)
-        else:
-            self._order.append(name)
+        with self._lock:
+            self.converters[name] = func
+            self._set_func(name, func, may_match, raises)
+
+            # The order is copied so it is never seen half updated
+            order = [t for t in self._order if t != name]
+            if priority is not None and priority < len(order):
+                order.insert(priority, name)
+            else:
+                order.append(name)
+            self._order = order
+            self._rebuild()
+
+    def install_vocabulary(self, name, vocabulary, priority=None):
+        """Registers a `Vocabulary`, or a dict of tokens to values, as the
+        converter for the type `name`.
+
+        A vocabulary can be installed ahead of the numeric converters at a
+        cost of one dict lookup per string. Bulk inference keeps deciding
+        numbers without it unless one of its tokens, such as "nan" or "1",
+        would be accepted by an earlier built-in converter.
+
+        A vocabulary whose values are all None, such as `Vocabulary.nulls`,
+        extends the 'none' converter instead, whatever `name` is, so its
+        tokens count as nulls everywhere. The 'none' converter is tried
+        first and keeps its place unless `priority` is given.
+        """
+        if not isinstance(vocabulary, Vocabulary):
+            vocabulary = Vocabulary(vocabulary)
+        if all(v is None for v in vocabulary.table.values()):
+            with self._lock:
+                base = self.converters.get('none')
+                if priority is None and 'none' in self._order:
+                    priority = self._order.index('none')
+            if isinstance(base, Vocabulary):
+                base = base.base
+            vocabulary = Vocabulary(vocabulary.table, base=base)
+            name = 'none'
+        self.register_converter(name, vocabulary, priority=priority)
+        return vocabulary
 
     def unregister_converter(self, name):
-        if name in self._order:
-            self._order.remove(name)
-        if name in self.converters:
-            del self.converters[name]
+        with self._lock:
+            self._order = [t for t in self._order if t != name]
+            if name in self.converters:
+                del self.converters[name]
+                del self._funcs[name]
+                del self._raises[name]
+                self.formats.pop(name, None)
+                self._may_match.pop(name, None)
+            self._rebuild()
 
     def get_converter(self, name):
         if name not in self.converters:
             raise KeyError('no converter for type "{0}"'.format(name))
         return self.converters[name]
 
+    def candidates(self, s):
+        """Returns the names of the converters that may match `s`
+        according to their `may_match` predicates."""
+        return tuple(t for t, _ in self._dispatch.select(s))
+
+    def _search(self, s):
+        # Returns the value and type of the first converter that accepts
+        # the string, or the string itself and None.
+        dispatch = self._dispatch
+        funcs = dispatch.select(s) if self.prescreen else dispatch.funcs
+        for t, func in funcs:
+            v = func(s)
+            if v is not NOMATCH:
+                return v, t
+        return s, None
+
+    def _profiled_search(self, s):
+        profile = self._profile
+        dispatch = self._dispatch
+        funcs = dispatch.select(s) if self.prescreen else dispatch.funcs
+        result = None
+        for t, func in funcs:
+            stats = profile.converter(t)
+            start = perf_counter_ns()
+            v = func(s)
+            hit = v is not NOMATCH
+            stats.record(perf_counter_ns() - start, hit)
+            if hit:
+                result = v, t
+                break
+        if result is None:
+            profile.strings += 1
+            result = s, None
+        profile.searched()
+        return result
+
     def convert(self, s, include_type=False):
         if s is None or s == '':
             s = 'None'
         if isinstance(s, str):
-            for t in self._order:
-                func = self.converters[t]
-                try:
-                    v = func(s)
-                    if include_type:
-                        return v, t
-                    return v
-                except ValueError:
-                    pass
+            cache = self._cache
+            if cache is None:
+                v, t = self._search(s)
+            else:
+                result = cache.get(s)
+                if result is None:
+                    self._misses += 1
+                    result = cache[s] = self._search(s)
+                    if len(cache) > self._cache_size:
+                        # Another thread may have emptied it meanwhile
+                        try:
+                            cache.popitem(last=False)
+                        except KeyError:
+                            pass
+                else:
+                    self._hits += 1
+                    try:
+                        cache.move_to_end(s)
+                    except KeyError:
+                        pass
+                v, t = result
+            if include_type:
+                return v, t
+            return v
+        if isinstance(s, (bytes, bytearray, memoryview)):
+            return self._convert_bytes(s, include_type)
         if include_type:
             return s, None
         return s
 
-    def convert_series(self, iterable, include_type=False):
-        for s in iterable:
-            yield self.convert(s, include_type=include_type)
+    def _convert_bytes(self, b, include_type=False, encoding='utf-8'):
+        # Numbers and nulls are converted from the bytes directly, other
+        # values are decoded and converted like strings.
+        t = _bytes_type(b, self._builtin_prefix())
+        if t is None:
+            return self.convert(str(b, encoding), include_type)
+        if t == 'none':
+            v = None
+        else:
+            if isinstance(b, memoryview):
+                b = b.tobytes()
+            v = int(b) if t == 'int' else float(b)
+        if include_type:
+            return v, t
+        return v
+
+    def _scoped(self, adaptive):
+        # A series is a single column, so it gets its own learned order
+        # unless the instance is already adaptive.
+        if adaptive and not self.adaptive:
+            return self.copy(adaptive=True)
+        return self
+
+    def _vector_prefix(self, vectorize):
+        # Number of built-in converters the NumPy backend can stand in
+        # for, zero when it should not be used.
+        if vectorize is False:
+            return 0
+        if _numpy() is None:
+            if vectorize:
+                raise ImportError('vectorize requires numpy')
+            return 0
+        k = self._builtin_prefix()
+        return k if k >= 2 else 0
+
+    def _vector_chunks(self, iterable, k, vectorize):
+        # Yields chunks of values with their classification codes, which
+        # are None for chunks that are too small to vectorize.
+        it = iter(iterable)
+        while True:
+            chunk = list(islice(it, VECTOR_CHUNK_SIZE))
+            if not chunk:
+                return
+            if vectorize or len(chunk) >= VECTOR_MIN_SIZE:
+                codes, trues = _vector_classify(_numpy(), chunk, k)
+                yield chunk, codes, trues
+            else:
+                yield chunk, None, None
+
+    def convert_series(self, iterable, include_type=False, adaptive=False,
+                       vectorize=None):
+        convert = self._scoped(adaptive).convert
+        k = self._vector_prefix(vectorize)
+
+        if not k:
+            for s in iterable:
+                yield convert(s, include_type=include_type)
+            return
+
+        funcs = (None, int, float, None)
+        for chunk, codes, trues in self._vector_chunks(iterable, k,
+                                                       vectorize):
+            if codes is None:
+                for s in chunk:
+                    yield convert(s, include_type=include_type)
+                continue
+
+            codes = codes.tolist()
+            trues = trues.tolist()
+
+            for i, s in enumerate(chunk):
+                code = codes[i]
+                if code < 0:
+                    yield convert(s, include_type=include_type)
+                    continue
+
+                if code == 0:
+                    v = None
+                elif code == 3:
+                    v = trues[i]
+                else:
+                    try:
+                        v = funcs[code](s)
+                    except ValueError:
+                        yield convert(s, include_type=include_type)
+                        continue
+
+                if include_type:
+                    yield v, _vector_types[code]
+                else:
+                    yield v
+
+    def convert_matrix(self, matrix, include_type=False, adaptive=False,
+                       plan=None):
+        """Converts each row of `matrix`. With a `plan`, a `RowPlan` or
+        the column types it is compiled from, every cell is converted by
+        its column's converter only."""
+        if plan is not None:
+            if not isinstance(plan, RowPlan):
+                plan = self.compile_plan(plan)
+            for i, r in enumerate(matrix):
+                yield plan.convert_row(r, i, include_type)
+            return
 
-    def convert_matrix(self, matrix, include_type=False):
+        columns = []
         for r in matrix:
-            yield tuple(self.convert(s, include_type=include_type) for s in r)
+            if adaptive:
+                while len(columns) < len(r):
+                    columns.append(self.copy(adaptive=True).convert)
+                yield tuple(columns[j](s, include_type=include_type)
+                            for j, s in enumerate(r))
+            else:
+                yield tuple(self.convert(s, include_type=include_type)
+                            for s in r)
+
+    def compile_plan(self, types, policy='keep'):
+        """Compiles a `RowPlan` from the column types returned by
+        `infer_matrix`, or from type names. Cells a column's converter
+        does not accept are handled according to `policy`, see
+        `RowPlan`."""
+        names = _type_names(types)
+        funcs = []
+        for t in names:
+            if t in ('string', 'empty', 'none'):
+                funcs.append(None)
+            else:
+                self.get_converter(t)
+                funcs.append(self._funcs[t])
+        return RowPlan(names, funcs, self._funcs.get('none'), policy,
+                       self.convert)
+
+    def convert_matrix_shared(self, matrix, types=None, executor=None,
+                              workers=None, chunk_size=None,
+                              use_numpy=None, max_pending=None):
+        """Converts the columns of `matrix` into a `SharedColumns`, whose
+        typed columns live in a `multiprocessing.shared_memory` block.
+
+        `types` are the column types returned by `infer_matrix`, or type
+        names, and are inferred when not given. With an `executor` or a
+        number of `workers`, chunks of rows are converted by worker
+        processes that write the typed columns into the block in place,
+        so only the values of other columns and the indexes of the errors
+        are sent back. `max_pending` bounds the chunks in flight, see
+        `infer_matrix`. Values that do not fit the column type are errors,
+        stored as nulls like `convert_column` does.
+        """
+        from multiprocessing import shared_memory
+
+        rows = list(matrix)
+        if types is None:
+            types = self.infer_matrix(rows, executor=executor,
+                                      workers=workers, chunk_size=chunk_size,
+                                      max_pending=max_pending)
+        names = _type_names(types)
+        for t in names:
+            if t not in ('string', 'empty', 'none'):
+                self.get_converter(t)
+
+        layout, size = _shared_layout(names, len(rows))
+        block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        try:
+            if executor is None and not workers:
+                results = [_convert_shared(self, block.buf, layout, rows, 0)]
+            else:
+                results = self._convert_shared_parallel(
+                    block.name, layout, rows, executor, workers, chunk_size,
+                    max_pending)
+        except BaseException:
+            block.close()
+            block.unlink()
+            raise
+
+        objects = {}
+        errors = {}
+        for chunk_objects, chunk_errors in results:
+            for j, values in chunk_objects.items():
+                objects.setdefault(j, []).extend(values)
+            for j, indexes in chunk_errors.items():
+                errors.setdefault(j, []).extend(indexes)
+        return SharedColumns(block, layout, len(rows), objects, errors,
+                             use_numpy)
+
+    def _convert_shared_parallel(self, name, layout, rows, executor,
+                                 workers, chunk_size, max_pending=None):
+        # Chunks of rows are converted by the executor into the block and
+        # their results collected in order. The number of chunks in
+        # flight is bounded like in `_infer_matrix_parallel`.
+        chunk_size = chunk_size or PARALLEL_CHUNK_SIZE
+        limit = _pending_limit(workers, max_pending)
+        shutdown = executor is None
+        if shutdown:
+            from concurrent.futures import ProcessPoolExecutor
+            executor = ProcessPoolExecutor(workers)
+        state = self._worker_state()
+
+        results = []
+        pending = deque()
+        try:
+            for start in range(0, len(rows), chunk_size):
+                pending.append(executor.submit(
+                    _convert_shared_chunk, state, name, layout,
+                    rows[start:start + chunk_size], start))
+                if len(pending) >= limit:
+                    results.append(pending.popleft().result())
+            while pending:
+                results.append(pending.popleft().result())
+        finally:
+            for future in pending:
+                future.cancel()
+            if shutdown:
+                executor.shutdown()
+        return results
 
     def infer(self, s, converted=False):
         v, t = self.convert(s, include_type=True)
@@ -168,64 +1426,1477 @@ class Strconv(object):
             return type(v)
         return t
 
-    def infer_series(self, iterable, n=None, size=10):
+    def _widening_infer(self, info):
+        # Returns an infer function for the column `info` that tries the
+        # converters of types below its widest type last, as values of
+        # those types cannot widen it. Values are still classified once
+        # the widest type is string, as `inferred_col_type(outliers=True)`
+        # looks past strings. The splits are cached for this call only, as
+        # `TYPE_PARENTS` may be changed in between.
+        splits = {}
+
+        def infer(s):
+            widest = info.widest
+            if widest is None or widest == 'none' or not isinstance(s, str):
+                return self.infer(s)
+            if s == '':
+                s = 'None'
+            dispatch = self._dispatch
+            parts = splits.get((dispatch, widest))
+            if parts is None:
+                parts = splits[dispatch, widest] = dispatch.split(widest)
+            above, below = parts
+            for t, func in above:
+                if func(s) is not NOMATCH:
+                    return t
+            for t, func in below:
+                if func(s) is not NOMATCH:
+                    return t
+            return None
+        return infer
+
+    def _column_infer(self, info, adaptive, widen):
+        s = self.copy(adaptive=True) if adaptive else self
+        return s._widening_infer(info) if widen else s.infer
+
+    def _infer_values(self, info, values, start, infer, codes=None):
+        # Updates `info` with the values, the first of which has index
+        # `start`, using the NumPy classification codes if given.
+        i = start - 1
+        if codes is None:
+            for i, value in enumerate(values, start):
+                t = infer(value)
+                info.incr(t)
+                info.add(t, i, value)
+            return i + 1 - start
+
+        np = _numpy()
+        # The decided types are counted last, but widening infer functions
+        # can already skip them for the undecided values.
+        for code in np.unique(codes).tolist():
+            if code >= 0:
+                info._widen(_vector_types[code])
+
+        groups = {}
+        for i in np.flatnonzero(codes < 0).tolist():
+            t = infer(values[i])
+            if t is None:
+                t = 'string'
+            if t not in groups:
+                info._widen(t)
+                groups[t] = []
+            groups[t].append(i)
+
+        for code, t in enumerate(_vector_types):
+            indexes = np.flatnonzero(codes == code)
+            if len(indexes):
+                indexes = indexes.tolist()
+                if t in groups:
+                    indexes = sorted(groups[t] + indexes)
+                groups[t] = indexes
+
+        # Types are added in order of first appearance so ties in the
+        # counts resolve like they do in the scalar path.
+        for t in sorted(groups, key=lambda t: groups[t][0]):
+            indexes = groups[t]
+            info.incr(t, len(indexes))
+            ti = info.types[t]
+            for i in indexes:
+                if ti.size is not None and len(ti.sample) >= ti.size:
+                    break
+                ti.add(start + i, values[i])
+        return len(codes)
+
+    def _infer_sampled(self, rows, size, stop, adaptive, widen=False):
+        # Infers the (index, row) pairs column by column, dropping the
+        # columns the stop rule is done with from the inner loop.
+        infos = []
+        infers = []
+        trackers = []
+        ends = []
+        active = None
+        total = 0
+
+        for i, row in rows:
+            if active is None:
+                active = list(range(len(row)))
+                for _ in active:
+                    info = Types(size=size)
+                    infos.append(info)
+                    infers.append(self._column_infer(info, adaptive, widen))
+                    trackers.append(stop.tracker() if stop else None)
+                    ends.append(None)
+
+            total += 1
+            done = False
+            for j in active:
+                if j >= len(row):
+                    continue
+                value = row[j]
+                t = infers[j](value)
+                info = infos[j]
+                info.incr(t)
+                info.add(t, i, value)
+                if stop is not None and trackers[j].update(t):
+                    ends[j] = total
+                    done = True
+
+            if done:
+                active = [j for j in active if ends[j] is None]
+                if not active:
+                    break
+
+        for info, end in zip(infos, ends):
+            info.set_total(end or total)
+        return infos
+
+    def infer_series(self, iterable, n=None, size=10, adaptive=False,
+                     vectorize=None, stop=None, reservoir=None, seed=None,
+                     types=None, widen=False):
+        """Infers the type information of a series of values.
+
+        `stop` is an `EarlyStop` rule that ends inference once the type
+        of the series has settled. With `reservoir`, only a uniform random
+        sample of that many values is inferred, seeded by `seed`.
+
+        With `widen`, the converters of types below the widest type seen
+        so far are tried last, so in a float column integers are counted
+        as floats without trying `convert_int`. The inferred type is the
+        same, with or without `outliers`, only the counts of the narrower
+        types differ.
+
+        `types` is the `Types` of the values preceding the series, e.g. as
+        restored by `Types.from_dict`. It is updated in place and returned.
+        """
+        start = 0
+        if types is not None:
+            start = types.total or 0
+        if stop is not None or reservoir:
+            if reservoir:
+                rows = _reservoir(iterable, n, reservoir, Random(seed))
+            else:
+                rows = enumerate(islice(iterable, n) if n else iterable)
+            infos = self._infer_sampled(((start + i, (v,)) for i, v in rows),
+                                        size, stop,
+                                        adaptive and not self.adaptive,
+                                        widen)
+            if types is not None:
+                return _resume([types], infos)[0]
+            return infos[0] if infos else None
+
         info = Types(size=size)
-        i = -1
+        infer = self._scoped(adaptive)._column_infer(info, False, widen)
+        k = self._vector_prefix(vectorize)
+        values = islice(iterable, n) if n else iterable
+        total = 0
+
+        if k:
+            for chunk, codes, _ in self._vector_chunks(values, k, vectorize):
+                self._infer_values(info, chunk, start + total, infer, codes)
+                total += len(chunk)
+        else:
+            total = self._infer_values(info, values, start, infer)
 
-        for i, value in enumerate(iterable):
-            if n and i >= n:
-                break
+        # No reason to return type info when no data exists
+        if total == 0:
+            return types
+
+        info.set_total(total)
+        if types is not None:
+            return types.merge(info)
+        return info
+
+    async def aconvert_series(self, aiterable, include_type=False,
+                              adaptive=False, batches=False, executor=None,
+                              chunk_size=None, encoding='utf-8'):
+        """Asynchronous `convert_series` over an async iterable, yielding
+        the converted values, or a list per batch if `batches` is true.
+
+        Bytes items, such as the lines of a `StreamReader`, are decoded
+        and stripped of their line ending. Values are converted in batches
+        in `executor` (the loop's default if None) so the event loop is
+        not blocked. At most one batch is read ahead of the one being
+        converted, and the batch size adapts so each batch takes about
+        the `ChunkSizer` target unless `chunk_size` fixes it.
+        """
+        import asyncio
+        loop = asyncio.get_running_loop()
+        convert = self._scoped(adaptive).convert
+        sizer = ChunkSizer.fixed(chunk_size) if chunk_size else ChunkSizer()
+
+        def work(batch):
+            t0 = perf_counter_ns()
+            out = [convert(s, include_type=include_type) for s in batch]
+            sizer.update(len(batch), perf_counter_ns() - t0)
+            return out
+
+        pending = None
+        async for batch in _abatches(aiterable, sizer, None, encoding):
+            if pending is not None:
+                out = await pending
+                if batches:
+                    yield out
+                else:
+                    for v in out:
+                        yield v
+            pending = loop.run_in_executor(executor, work, batch)
+
+        if pending is not None:
+            out = await pending
+            if batches:
+                yield out
+            else:
+                for v in out:
+                    yield v
+
+    async def ainfer_series(self, aiterable, n=None, size=10, adaptive=False,
+                            executor=None, chunk_size=None,
+                            encoding='utf-8'):
+        """Asynchronous `infer_series` over an async iterable, batched the
+        same way as `aconvert_series`."""
+        import asyncio
+        loop = asyncio.get_running_loop()
+        infer = self._scoped(adaptive).infer
+        sizer = ChunkSizer.fixed(chunk_size) if chunk_size else ChunkSizer()
+        info = Types(size=size)
+        total = 0
+
+        def work(batch, start):
+            t0 = perf_counter_ns()
+            self._infer_values(info, batch, start, infer)
+            sizer.update(len(batch), perf_counter_ns() - t0)
+
+        pending = None
+        async for batch in _abatches(aiterable, sizer, n, encoding):
+            if pending is not None:
+                await pending
+            pending = loop.run_in_executor(executor, work, batch, total)
+            total += len(batch)
+
+        if pending is not None:
+            await pending
+
+        if total == 0:
+            return
 
-            t = self.infer(value)
+        info.set_total(total)
+        return info
+
+    def _builtin_prefix(self):
+        # Number of leading converters that are the unmodified built-ins
+        # in their default order. Bulk paths rely on their exact rules.
+        return self._dispatch.prefix
+
+    def _decode_column(self, values, encoding='utf-8'):
+        # Bytes nulls are decided like `convert` does and become None,
+        # other bytes are decoded for the string converters.
+        k = self._builtin_prefix()
+        out = []
+        for v in values:
+            if isinstance(v, (bytes, bytearray, memoryview)):
+                v = None if _bytes_type(v, k) == 'none' else str(v, encoding)
+            out.append(v)
+        return out
+
+    def _null_flags(self, values):
+        none = self._funcs.get('none')
+        flags = []
+        for v in values:
+            if v is None or v == '':
+                flags.append(True)
+                continue
+            flags.append(none is not None and isinstance(v, str) and
+                         none(v) is not NOMATCH)
+        return flags
+
+    def infer_column(self, values, n=None, size=10):
+        """Same as `infer_series` for a list of values, but checks
+        the whole column with `int` in one go first."""
+        values = list(islice(values, n) if n else values)
+        if not values:
+            return
+        return self._infer_column(values, size)[0]
+
+    def _infer_column(self, values, size):
+        # Returns the `Types` of the values along with the type and the
+        # converted value of each, which `convert_column` reuses.
+        info = Types(size=size)
+
+        types = None
+        if self._builtin_prefix() >= 2:
+            nulls = self._null_flags(values)
+            rest = [v for v, null in zip(values, nulls) if not null]
+            if all(isinstance(v, str) for v in rest):
+                try:
+                    ints = iter(list(map(int, rest)))
+                except ValueError:
+                    pass
+                else:
+                    types = ['none' if null else 'int' for null in nulls]
+                    converted = [None if null else next(ints)
+                                 for null in nulls]
+
+        if types is None:
+            converted = []
+            types = []
+            for v in values:
+                v, t = self.convert(v, include_type=True)
+                converted.append(v)
+                types.append(t)
+
+        for i, (t, value) in enumerate(zip(types, values)):
             info.incr(t)
             info.add(t, i, value)
 
-        i += 1
+        info.set_total(len(values))
+        return info, types, converted
 
-        # No reason to return type info when no data exists
-        if i == 0:
+    def _convert_to(self, s, type, func):
+        # Converts `s` with the converter of `type`, or else to the type
+        # it is inferred as, lifted to `type` if it is below it.
+        try:
+            v = func(s)
+        except (ValueError, TypeError):
+            v = NOMATCH
+        if v is NOMATCH and isinstance(s, str):
+            v, t = self.convert(s, include_type=True)
+            v = lift(v, t, type) if t else NOMATCH
+        return v
+
+    def convert_column(self, values, type=None, n=None, size=10,
+                       use_numpy=None):
+        """Converts a column of values to a single type.
+
+        The type is inferred with `infer_column` (from the first `n`
+        values if given) unless passed explicitly. Every value is then
+        converted with that type's converter only, except for the values
+        the inference already converted to that type, which are reused.
+        Bytes are decoded first. Returns a `Column`. NumPy arrays are
+        returned when NumPy is installed, unless `use_numpy` is false.
+        """
+        values = list(values)
+        if any(isinstance(v, (bytes, bytearray, memoryview))
+               for v in values):
+            values = self._decode_column(values)
+        info = None
+        types = converted = ()
+        if type is None:
+            type = 'empty'
+            prefix = values[:n] if n else values
+            if prefix:
+                info, types, converted = self._infer_column(prefix, size)
+                type = info.inferred_col_type(outliers=True)[0][0]
+        elif type not in ('string', 'empty', 'none'):
+            self.get_converter(type)
+
+        nulls = self._null_flags(values)
+        errors = []
+        typecode = COLUMN_TYPECODES.get(type)
+
+        if type in ('empty', 'none'):
+            out = [None] * len(values)
+        elif type == 'string':
+            out = [None if null else v for v, null in zip(values, nulls)]
+        else:
+            func = self._funcs[type]
+            fill = 0 if typecode else None
+            out = None
+            known = len(types)
+            if known < len(values):
+                pad = len(values) - len(types)
+                types = list(types) + [None] * pad
+                converted = list(converted) + [None] * pad
+
+            # Bulk conversion, nulls are parsed from a zero placeholder
+            if type in ('int', 'float'):
+                try:
+                    out = array(typecode, [
+                        fill if null else c if t == type else func(v)
+                        for v, null, t, c in zip(values, nulls, types,
+                                                 converted)])
+                except (ValueError, TypeError, OverflowError):
+                    out = None
+
+            if out is None:
+                out = []
+                for i, (v, null) in enumerate(zip(values, nulls)):
+                    if not null:
+                        if i < known:
+                            # Strings no converter accepted are not retried
+                            v = NOMATCH
+                            if types[i] is not None:
+                                v = lift(converted[i], types[i], type)
+                        else:
+                            v = self._convert_to(v, type, func)
+                        if v is not NOMATCH:
+                            out.append(v)
+                            continue
+                        errors.append(i)
+                        nulls[i] = True
+                    out.append(fill)
+
+                if typecode:
+                    try:
+                        out = array(typecode, out)
+                    except OverflowError:
+                        pass
+
+        np = _numpy() if use_numpy is not False else None
+        if np is not None:
+            if isinstance(out, array):
+                out = np.frombuffer(out, dtype=out.typecode).copy()
+                if type == 'bool':
+                    out = out.astype(bool)
+            else:
+                out = np.array(out, dtype=object)
+            nulls = np.array(nulls, dtype=bool)
+        else:
+            nulls = _bitmap(nulls)
+
+        return Column(type, out, nulls, errors, info)
+
+    def _infer_rows(self, infos, rows, start, k=0, vectorize=None,
+                    infers=None):
+        # Updates the column infos with a chunk of rows, the first of
+        # which has index `start`.
+        width = len(infos)
+
+        # Columns are only vectorized when every row is complete
+        if k and (vectorize or len(rows) >= VECTOR_MIN_SIZE) and \
+                all(len(row) == width for row in rows):
+            np = _numpy()
+            for j, column in enumerate(zip(*rows)):
+                codes = _vector_classify(np, column, k)[0]
+                infer = infers[j] if infers else self.infer
+                self._infer_values(infos[j], column, start, infer, codes)
             return
 
-        info.set_total(i)
-        return info
+        if self._builtin_prefix():
+            self._infer_shapes(infos, rows, start, infers)
+            return
+
+        for i, row in enumerate(rows, start):
+            for j, value in enumerate(row):
+                info = infos[j]
+                t = infers[j](value) if infers else self.infer(value)
+                info.incr(t)
+                info.add(t, i, value)
 
-    def infer_matrix(self, matrix, n=None, size=10):
+    def _infer_shapes(self, infos, rows, start, infers=None):
+        # Rows are grouped by their shape, the row with every ASCII digit
+        # replaced by '0'. The nulls, integers and floats of a shape are
+        # the same for all its rows, so they are counted once per shape
+        # and only added to the samples until those are full. Other cells
+        # are inferred one by one.
+        k = self._builtin_prefix()
+        infer = self.infer
+        shapes = {}
+        sigs = {}
+
+        for i, row in enumerate(rows, start):
+            try:
+                sig = tuple(map(str.translate, row, repeat(_shape_table)))
+            except TypeError:
+                sig = None
+            entry = sigs.get(sig) if sig is not None else None
+            if entry is None:
+                if sig is None or len(sigs) >= SHAPE_CACHE_SIZE:
+                    for j, value in enumerate(row):
+                        info = infos[j]
+                        t = infers[j](value) if infers else infer(value)
+                        info.incr(t)
+                        info.add(t, i, value)
+                    continue
+                decided = tuple(_shape_type(shape, shapes, k)
+                                for shape in sig)
+                entry = sigs[sig] = [0, decided, tuple(range(len(row)))]
+                # Counted last, but known to widen the columns already
+                for j, t in enumerate(decided):
+                    if t is not None:
+                        infos[j]._widen(t)
+
+            entry[0] += 1
+            decided = entry[1]
+            full = False
+            for j in entry[2]:
+                value = row[j]
+                info = infos[j]
+                t = decided[j]
+                if t is None:
+                    t = infers[j](value) if infers else infer(value)
+                    info.incr(t)
+                    info.add(t, i, value)
+                    continue
+                ti = info.types.get(t)
+                if ti is None or ti.size is None or len(ti.sample) < ti.size:
+                    info.add(t, i, value)
+                else:
+                    full = True
+
+            # Drop the decided columns whose samples are full
+            if full:
+                entry[2] = tuple(j for j in entry[2]
+                                 if decided[j] is None or
+                                 not _sample_full(infos[j].types[decided[j]]))
+
+        for count, decided, _ in sigs.values():
+            for j, t in enumerate(decided):
+                if t is not None:
+                    infos[j].incr(t, count)
+
+    def infer_matrix(self, matrix, n=None, size=10, adaptive=False,
+                     vectorize=None, executor=None, workers=None,
+                     chunk_size=None, stop=None, reservoir=None, seed=None,
+                     types=None, widen=False, max_pending=None):
+        """Infers the type information of each column of a matrix.
+
+        With an `executor`, or a number of `workers` for a process pool,
+        chunks of `chunk_size` rows are inferred in parallel. At most
+        `max_pending` chunks are in flight, twice the number of workers or
+        CPUs by default.
+
+        `stop` is an `EarlyStop` rule applied per column. Columns that are
+        done are skipped for the remaining rows, and inference ends once
+        all of them are. With `reservoir`, only a uniform random sample of
+        that many rows is inferred, seeded by `seed`.
+
+        `types` is the list of `Types` of the rows preceding the matrix, as
+        returned by an earlier call. It is updated in place and returned.
+        `widen` is applied per column, see `infer_series`.
+        """
+        start = 0
+        if types:
+            start = max(info.total or 0 for info in types)
+
+        if stop is not None or reservoir:
+            if reservoir:
+                rows = _reservoir(matrix, n, reservoir, Random(seed))
+            else:
+                rows = enumerate(islice(matrix, n) if n else matrix)
+            rows = ((start + i, row) for i, row in rows)
+            infos = self._infer_sampled(rows, size, stop, adaptive, widen)
+            return infos if types is None else _resume(types, infos)
+
+        rows = iter(islice(matrix, n) if n else matrix)
+        if executor is not None or workers:
+            infos = self._infer_matrix_parallel(rows, size, adaptive,
+                                                vectorize, executor, workers,
+                                                chunk_size, start, widen,
+                                                max_pending)
+            return infos if types is None else _resume(types, infos)
+
+        k = self._vector_prefix(vectorize)
         infos = []
-        i = -1
+        infers = []
+        total = 0
 
-        for i, iterable in enumerate(matrix):
-            if n and i >= n:
+        while True:
+            chunk = list(islice(rows, VECTOR_CHUNK_SIZE))
+            if not chunk:
                 break
 
-            for j, value in enumerate(iterable):
-                if i == 0:
-                    infos.append(Types(size=size))
-                info = infos[j]
+            if total == 0:
+                for _ in chunk[0]:
+                    info = Types(size=size)
+                    infos.append(info)
+                    if adaptive or widen:
+                        infers.append(self._column_infer(info, adaptive,
+                                                         widen))
 
-                t = self.infer(value)
-                info.incr(t)
-                info.add(t, i, value)
+            self._infer_rows(infos, chunk, start + total, k, vectorize,
+                             infers)
+            total += len(chunk)
 
-        i += 1
+        for info in infos:
+            info.set_total(total)
+
+        return infos if types is None else _resume(types, infos)
+
+    def infer_matrix_compact(self, matrix, n=None, size=0, vectorize=None):
+        """Same as `infer_matrix`, but returns a `TypeMatrix` that keeps the
+        counts of all columns in one array. Samples of up to `size` values
+        per column and type are only kept when `size` is non-zero."""
+        k = 0 if size else self._vector_prefix(vectorize)
+        rows = iter(islice(matrix, n) if n else matrix)
+        infos = None
+        total = 0
+
+        while True:
+            chunk = list(islice(rows, VECTOR_CHUNK_SIZE))
+            if not chunk:
+                break
+
+            if infos is None:
+                infos = TypeMatrix(len(chunk[0]), self._order + ['string'],
+                                   size)
+            width = infos.width
+
+            if k and (vectorize or len(chunk) >= VECTOR_MIN_SIZE) and \
+                    all(len(row) == width for row in chunk):
+                np = _numpy()
+                for j, column in enumerate(zip(*chunk)):
+                    codes = _vector_classify(np, column, k)[0]
+                    for i in np.flatnonzero(codes < 0).tolist():
+                        infos.incr(j, self.infer(column[i]), total + i)
+                    for code, t in enumerate(_vector_types):
+                        indexes = np.flatnonzero(codes == code)
+                        if len(indexes):
+                            infos.incr(j, t, total + int(indexes[0]),
+                                       len(indexes))
+            else:
+                for i, row in enumerate(chunk, total):
+                    for j, value in enumerate(row):
+                        t = self.infer(value)
+                        infos.incr(j, t, i)
+                        infos.add(j, t, i, value)
+
+            total += len(chunk)
+
+        if infos is None:
+            return TypeMatrix(0)
+        for j in range(infos.width):
+            infos.set_total(j, total)
+        return infos
+
+    def _infer_matrix_parallel(self, rows, size, adaptive, vectorize,
+                               executor, workers, chunk_size, start=0,
+                               widen=False, max_pending=None):
+        # Chunks of rows are inferred by the executor and merged in order.
+        # The number of chunks in flight is bounded to keep memory flat.
+        chunk_size = chunk_size or PARALLEL_CHUNK_SIZE
+        limit = _pending_limit(workers, max_pending)
+        shutdown = executor is None
+        if shutdown:
+            from concurrent.futures import ProcessPoolExecutor
+            executor = ProcessPoolExecutor(workers)
+        state = self._worker_state()
+
+        infos = []
+        pending = deque()
+        total = 0
+
+        def merge(result):
+            for j, info in enumerate(result):
+                if j < len(infos):
+                    infos[j].merge(info)
+                else:
+                    infos.append(info)
+
+        try:
+            while True:
+                chunk = list(islice(rows, chunk_size))
+                if not chunk:
+                    break
+                pending.append(executor.submit(_infer_chunk, state, chunk,
+                                               start + total, size,
+                                               adaptive, vectorize, widen))
+                total += len(chunk)
+                if len(pending) >= limit:
+                    merge(pending.popleft().result())
+
+            while pending:
+                merge(pending.popleft().result())
+        finally:
+            for future in pending:
+                future.cancel()
+            if shutdown:
+                executor.shutdown()
 
         for info in infos:
-            info.set_total(i)
+            info.set_total(total)
 
         return infos
 
+    def convert_csv(self, f, header=None, include_type=False, size=10,
+                    chunk_size=None, encoding='utf-8', **fmtparams):
+        """Returns a `CSVStream` over a path or file object that yields the
+        converted rows and infers the column types in the same pass."""
+        return CSVStream(self, f, header=header, include_type=include_type,
+                         size=size, chunk_size=chunk_size,
+                         encoding=encoding, **fmtparams)
+
+    def infer_csv(self, f, n=None, size=10, header=None, chunk_size=None,
+                  encoding='utf-8', **fmtparams):
+        """Infers the column types of a CSV path or file object in a single
+        bounded-memory pass. Returns the header (None if there is none) and
+        the list of `Types` like `infer_matrix`."""
+        stream = CSVStream(self, f, header=header, size=size,
+                           chunk_size=chunk_size, encoding=encoding,
+                           **fmtparams)
+        for _ in stream.chunks(convert=False, n=n):
+            pass
+        return stream.header, stream.types
+
+    def infer_file(self, path, delimiter=b',', n=None, size=10,
+                   header=False, encoding='utf-8'):
+        """Infers the column types of a delimited file without quoting,
+        such as a log file, read through `mmap`.
+
+        Nulls, integers and floats are recognized from the bytes in
+        place, only the other cells and the sampled values are decoded to
+        strings. Returns the header (the decoded first line if `header`
+        is true, None otherwise) and the list of `Types` like
+        `infer_matrix`.
+        """
+        if isinstance(delimiter, str):
+            delimiter = delimiter.encode(encoding)
+
+        with open(path, 'rb') as f:
+            if not os.fstat(f.fileno()).st_size:
+                return None, []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return self._infer_mmap(mm, delimiter, n, size, header,
+                                        encoding)
+
+    def _infer_mmap(self, mm, delimiter, n, size, header, encoding):
+        k = self._builtin_prefix()
+        infer = self.infer
+        infos = []
+        counts = []
+        names = None
+        end = len(mm)
+        pos = 0
+        i = 0
+
+        while pos < end and (not n or i < n):
+            eol = mm.find(b'\n', pos)
+            if eol < 0:
+                eol = end
+            stop = eol
+            if stop > pos and mm[stop - 1] == 13:
+                stop -= 1
+            if stop == pos:
+                # Blank lines have no cells, like in `csv`
+                pos = eol + 1
+                continue
+
+            if header and names is None:
+                names = str(mm[pos:stop], encoding).split(
+                    str(delimiter, encoding))
+                pos = eol + 1
+                continue
+
+            j = 0
+            a = pos
+            while True:
+                b = mm.find(delimiter, a, stop)
+                if b < 0:
+                    b = stop
+                if j == len(infos):
+                    infos.append(Types(size=size))
+                    counts.append({})
+                info = infos[j]
+
+                value = None
+                t = _bytes_type(mm, k, a, b)
+                if t is None:
+                    value = str(mm[a:b], encoding)
+                    t = infer(value) or 'string'
+                c = counts[j]
+                c[t] = c.get(t, 0) + 1
+
+                # Types are added to `info` on first sight, so they keep
+                # the order of first appearance.
+                ti = info.types.get(t)
+                if ti is None or ti.size is None or len(ti.sample) < ti.size:
+                    if value is None:
+                        value = str(mm[a:b], encoding)
+                    info.add(t, i, value)
+
+                j += 1
+                if b == stop:
+                    break
+                a = b + len(delimiter)
+
+            i += 1
+            pos = eol + 1
+
+        for info, c in zip(infos, counts):
+            for t, count in c.items():
+                info.incr(t, count)
+            info.set_total(i)
+        return names, infos
+
+
+# Maximum number of distinct row shapes `_infer_shapes` keeps. Rows of
+# other shapes are inferred cell by cell.
+SHAPE_CACHE_SIZE = 4096
+
+_shape_table = str.maketrans('123456789', '000000000')
+
+
+def _shape_type(shape, cache, k):
+    # Type of every cell with the given shape according to the first `k`
+    # built-in converters, None if the shape does not decide it.
+    t = cache.get(shape, False)
+    if t is False:
+        t = None
+        if shape == '' or shape == 'None':
+            t = 'none'
+        elif '0' in shape:
+            if k > 1 and try_int(shape) is not NOMATCH:
+                t = 'int'
+            elif k > 2 and try_float(shape) is not NOMATCH:
+                t = 'float'
+        cache[shape] = t
+    return t
+
+
+def _sample_full(info):
+    return info.size is not None and len(info.sample) >= info.size
+
+
+PLAN_POLICIES = ('keep', 'none', 'error')
+
+
+class RowPlan(object):
+    """Fixed per column conversion compiled by `Strconv.compile_plan`.
+
+    Each cell is converted by its column's converter, nulls are converted
+    to None and values of a narrower type are lifted to the column's type
+    with `lift`. Any other cell the converter does not accept is kept as
+    is with the 'keep' policy, replaced by None with 'none', and with
+    'error' replaced by None and recorded as `(row, column, value)` in
+    `errors`. Cells beyond the planned columns are converted normally.
+    """
+
+    __slots__ = ('types', 'funcs', 'policy', 'errors', '_none', '_convert')
+
+    def __init__(self, types, funcs, none=None, policy='keep',
+                 convert=None):
+        if policy not in PLAN_POLICIES:
+            raise ValueError('policy must be one of {0}'.format(
+                ', '.join(PLAN_POLICIES)))
+        self.types = tuple(types)
+        self.funcs = tuple(funcs)
+        self.policy = policy
+        self.errors = []
+        self._none = none
+        self._convert = convert
+
+    def __repr__(self):
+        return '<{0}: {1}>'.format(self.__class__.__name__,
+                                   ', '.join(self.types))
+
+    def __len__(self):
+        return len(self.types)
+
+    def _is_null(self, s):
+        return s == '' or (self._none is not None and
+                           self._none(s) is not NOMATCH)
+
+    def convert_row(self, row, i=0, include_type=False):
+        """Converts `row`, which is row `i` for the error report."""
+        funcs = self.funcs
+        types = self.types
+        width = len(funcs)
+        out = []
+
+        for j, s in enumerate(row):
+            if j >= width:
+                out.append(self._convert(s, include_type=include_type))
+                continue
+            if s is None:
+                out.append((None, 'none') if include_type else None)
+                continue
+            if not isinstance(s, str):
+                out.append((s, None) if include_type else s)
+                continue
+
+            t = types[j]
+            func = funcs[j]
+            v = NOMATCH if func is None else func(s)
+            if v is NOMATCH:
+                if self._is_null(s):
+                    v, t = None, 'none'
+                elif t == 'string':
+                    v, t = s, None
+                else:
+                    # Values of a narrower type are lifted to the column's
+                    v, found = self._convert(s, include_type=True)
+                    v = lift(v, found, t) if found else NOMATCH
+                    if v is NOMATCH:
+                        t = None
+                        if self.policy == 'keep':
+                            v = s
+                        else:
+                            v = None
+                            if self.policy == 'error':
+                                self.errors.append((i, j, s))
+            out.append((v, t) if include_type else v)
+        return tuple(out)
+
+    def convert(self, rows, start=0, include_type=False):
+        """Yields the converted rows, numbered from `start`."""
+        for i, row in enumerate(rows, start):
+            yield self.convert_row(row, i, include_type)
+
+
+class ChunkSizer(object):
+    """Number of values per batch of the async entry points, adapted so
+    converting a batch takes about `target` seconds. The size at most
+    doubles or halves per batch and stays within `minimum` and
+    `maximum`."""
+
+    __slots__ = ('size', 'target', 'minimum', 'maximum')
+
+    def __init__(self, size=256, target=0.005, minimum=16, maximum=65536):
+        self.size = size
+        self.target = target
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def __repr__(self):
+        return '<{0}: {1}>'.format(self.__class__.__name__, self.size)
+
+    @classmethod
+    def fixed(cls, size):
+        return cls(size, minimum=size, maximum=size)
+
+    def update(self, n, ns):
+        """Adapts the size to a batch of `n` values that took `ns`
+        nanoseconds."""
+        if ns > 0:
+            size = int(n * self.target * 1e9 / ns)
+        else:
+            size = self.size * 2
+        size = max(self.size // 2, min(size, self.size * 2))
+        self.size = max(self.minimum, min(size, self.maximum))
+
+
+def _strip_line(s):
+    if s.endswith('\n'):
+        s = s[:-1]
+    if s.endswith('\r'):
+        s = s[:-1]
+    return s
+
+
+async def _abatches(aiterable, sizer, n, encoding):
+    # Groups the items of an async iterable in lists of `sizer.size`
+    # items, the last one possibly shorter, up to `n` items in total.
+    batch = []
+    total = 0
+    async for item in aiterable:
+        if isinstance(item, (bytes, bytearray, memoryview)):
+            item = _strip_line(bytes(item).decode(encoding))
+        batch.append(item)
+        total += 1
+        if total == n:
+            break
+        if len(batch) >= sizer.size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class ConverterStats(object):
+    """Profiling counters of a single converter. The histogram maps the
+    exclusive upper bound of each power of two latency bucket, in
+    nanoseconds, to the number of calls that fell in it."""
+    __slots__ = ('attempts', 'hits', 'misses', 'time', 'histogram')
+
+    def __init__(self):
+        self.attempts = 0
+        self.hits = 0
+        self.misses = 0
+        self.time = 0
+        self.histogram = Counter()
+
+    def __repr__(self):
+        return '<{0}: {1} attempts, {2} hits>'.format(
+            self.__class__.__name__, self.attempts, self.hits)
+
+    def record(self, ns, hit):
+        self.attempts += 1
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        self.time += ns
+        self.histogram[ns.bit_length()] += 1
+
+    def to_dict(self):
+        return {
+            'attempts': self.attempts,
+            'hits': self.hits,
+            'misses': self.misses,
+            'time': self.time / 1e9,
+            'histogram': {2 ** b: n for b, n in
+                          sorted(self.histogram.items())},
+        }
+
+
+class Profile(object):
+    __slots__ = ('values', 'strings', 'converters', 'callback', 'every')
+
+    def __init__(self, callback=None, every=1000):
+        self.callback = callback
+        self.every = every
+        self.reset()
+
+    def __repr__(self):
+        return '<{0}: {1} values>'.format(self.__class__.__name__,
+                                          self.values)
+
+    def reset(self):
+        self.values = 0
+        self.strings = 0
+        self.converters = {}
+
+    def converter(self, t):
+        stats = self.converters.get(t)
+        if stats is None:
+            stats = self.converters[t] = ConverterStats()
+        return stats
+
+    def searched(self):
+        self.values += 1
+        if self.callback is not None and self.values % self.every == 0:
+            self.callback(self.to_dict())
+
+    def to_dict(self):
+        return {
+            'values': self.values,
+            'strings': self.strings,
+            'converters': {t: stats.to_dict()
+                           for t, stats in self.converters.items()},
+        }
+
+
+class EarlyStop(object):
+    """Rule for ending the inference of a column before all of its values
+    are read.
+
+    With `patience`, a column is done once that many values in a row did
+    not add a new non-null type. With `confidence`, it is done once the
+    share of its most common non-null type is known within `margin` at
+    that confidence level, using the Wilson score interval. Either
+    condition ends the column.
+    """
+
+    def __init__(self, patience=None, confidence=None, margin=0.01):
+        if patience is None and confidence is None:
+            raise ValueError('patience or confidence is required')
+        if confidence is not None and not 0 < confidence < 1:
+            raise ValueError('confidence must be between 0 and 1')
+        self.patience = patience
+        self.confidence = confidence
+        self.margin = margin
+        self.z = None
+        if confidence is not None:
+            from statistics import NormalDist
+            self.z = NormalDist().inv_cdf(0.5 + confidence / 2.)
+
+    def __repr__(self):
+        return '<{0}: patience={1} confidence={2} margin={3}>'.format(
+            self.__class__.__name__, self.patience, self.confidence,
+            self.margin)
+
+    def tracker(self):
+        return _StopTracker(self)
+
+
+class _StopTracker(object):
+    # Per-column state of an `EarlyStop` rule
+
+    __slots__ = ('rule', 'counts', 'seen', 'nonnull', 'last_new', 'top')
+
+    def __init__(self, rule):
+        self.rule = rule
+        self.counts = {}
+        self.seen = 0
+        self.nonnull = 0
+        self.last_new = 0
+        self.top = 0
+
+    def update(self, t):
+        """Records the type of the next value and returns true once the
+        column is done."""
+        self.seen += 1
+        if t != 'none':
+            c = self.counts.get(t, 0) + 1
+            self.counts[t] = c
+            self.nonnull += 1
+            if c == 1:
+                self.last_new = self.seen
+            if c > self.top:
+                self.top = c
+
+        rule = self.rule
+        if rule.patience and self.seen - self.last_new >= rule.patience:
+            return True
+
+        z = rule.z
+        n = self.nonnull
+        if z is None or not n:
+            return False
+        p = self.top / float(n)
+        zz = z * z
+        half = z / (1 + zz / n) * math.sqrt(p * (1 - p) / n +
+                                            zz / (4. * n * n))
+        return half <= rule.margin
+
+
+def _uniform(rng):
+    # Uniform float in the open interval (0, 1)
+    u = 0.
+    while not u:
+        u = rng.random()
+    return u
+
+
+def _reservoir(iterable, n, k, rng):
+    """Returns a uniform random sample of `k` of the first `n` items as
+    `(index, item)` pairs in index order.
+
+    Sequences are sampled by index without reading the other items. For
+    other iterables, skipped items are still consumed but never stored or
+    converted (Li's algorithm L).
+    """
+    if hasattr(iterable, '__len__') and hasattr(iterable, '__getitem__'):
+        size = len(iterable)
+        if n:
+            size = min(size, n)
+        indexes = range(size)
+        if size > k:
+            indexes = sorted(rng.sample(indexes, k))
+        return [(i, iterable[i]) for i in indexes]
+
+    items = enumerate(islice(iterable, n) if n else iterable)
+    sample = list(islice(items, k))
+    if len(sample) < k:
+        return sample
+
+    w = math.exp(math.log(_uniform(rng)) / k)
+    while True:
+        skip = int(math.log(_uniform(rng)) / math.log(1 - w))
+        item = next(islice(items, skip, skip + 1), None)
+        if item is None:
+            break
+        sample[rng.randrange(k)] = item
+        w *= math.exp(math.log(_uniform(rng)) / k)
+
+    sample.sort(key=itemgetter(0))
+    return sample
+
+
+# Rows handed to each task of a parallel `infer_matrix`
+PARALLEL_CHUNK_SIZE = 10000
+
+
+def _pending_limit(workers, max_pending):
+    # Chunks in flight of the parallel paths
+    if max_pending is None:
+        return 2 * (workers or os.cpu_count() or 1)
+    if max_pending < 1:
+        raise ValueError('max_pending must be at least 1')
+    return max_pending
+
+
+def _from_state(state):
+    # Rebuilds a `Strconv` from its `_worker_state` in a worker process
+    cls, converters, adaptive, prescreen, cache_size, learned = state
+    strconv = cls(converters=converters, adaptive=adaptive,
+                  prescreen=prescreen, cache_size=cache_size)
+    for t, (hits, order) in learned.items():
+        formats = strconv.formats.get(t)
+        if formats is not None:
+            formats.hits.update(hits)
+            formats._learned = order
+    return strconv
+
+
+def _infer_chunk(state, rows, start, size, adaptive, vectorize,
+                 widen=False):
+    # Runs in the worker processes of a parallel `infer_matrix`, so
+    # the converters need to be picklable.
+    strconv = _from_state(state)
+    infos = [Types(size=size) for _ in rows[0]]
+    infers = None
+    if adaptive or widen:
+        infers = [strconv._column_infer(info, adaptive, widen)
+                  for info in infos]
+    k = strconv._vector_prefix(vectorize)
+    strconv._infer_rows(infos, rows, start, k, vectorize, infers)
+    for info in infos:
+        info.set_total(len(rows))
+    return infos
+
+
+def _shared_layout(types, n):
+    # (type, typecode, values offset, nulls offset) of each column of `n`
+    # rows and the size of the block. Offsets are 8-byte aligned.
+    layout = []
+    offset = 0
+    for t in types:
+        typecode = SHARED_TYPECODES.get(t)
+        values_offset = None
+        if typecode is not None:
+            values_offset = offset
+            offset += -(-n * array(typecode).itemsize // 8) * 8
+        layout.append((t, typecode, values_offset, offset))
+        offset += -(-n // 8) * 8
+    return layout, offset
+
+
+def _convert_shared(strconv, buf, layout, rows, start):
+    # Converts a chunk of rows starting at row `start` into the block.
+    # Returns the values of the columns not stored in it and the errors.
+    objects = {}
+    errors = {}
+    n = len(rows)
+    for j, (t, typecode, offset, nulls_offset) in enumerate(layout):
+        if t in ('empty', 'none'):
+            buf[nulls_offset + start:nulls_offset + start + n] = b'\x01' * n
+            continue
+
+        values = [row[j] if j < len(row) else None for row in rows]
+        column = strconv.convert_column(values, type=t, use_numpy=False)
+        nulls = bytearray(_unpack_bitmap(column.nulls, n))
+        errors[j] = [start + i for i in column.errors]
+
+        if typecode is None:
+            objects[j] = column.tolist()
+        else:
+            out = column.values
+            if t in ('datetime', 'date', 'time'):
+                out = [0 if v is None else _encode_temporal(t, v)
+                       for v in out]
+            if isinstance(out, list):
+                # Integers out of the int64 range are errors
+                for i, v in enumerate(out):
+                    if not -2 ** 63 <= v < 2 ** 63:
+                        out[i] = 0
+                        nulls[i] = 1
+                        errors[j].append(start + i)
+                out = array(typecode, out)
+            size = out.itemsize
+            buf[offset + start * size:offset + (start + n) * size] = \
+                memoryview(out).cast('B')
+        buf[nulls_offset + start:nulls_offset + start + n] = nulls
+    return objects, errors
+
+
+def _convert_shared_chunk(state, name, layout, rows, start):
+    # Runs in the worker processes of `convert_matrix_shared`
+    from multiprocessing import shared_memory
+    strconv = _from_state(state)
+    block = shared_memory.SharedMemory(name)
+    try:
+        return _convert_shared(strconv, block.buf, layout, rows, start)
+    finally:
+        block.close()
+
+
+# Rows read from a CSV source at a time
+CSV_CHUNK_SIZE = 4096
+
+
+class CSVStream(object):
+    """Converts the rows of a CSV source and infers their column types in
+    a single pass.
+
+    Rows are read `chunk_size` at a time, so memory use does not grow with
+    the size of the source. `types` holds the `Types` of each column for
+    the rows read so far. Whenever the inferred type of a column changes
+    from one chunk to the next, `(row, column, old, new)` is appended to
+    `changes`, where `row` is the first row of the chunk. The types are
+    updated before a chunk is converted, and each cell is converted by its
+    column's converter, falling back to the full chain for the cells it
+    does not accept. Rows yielded before a change only need to be re-typed
+    for the changed columns, which `retype` does from the raw rows.
+
+    With `header=None`, the first row is taken as the header if all of
+    its cells are strings and the rest of the first chunk has a column of
+    another type.
+    """
+
+    def __init__(self, strconv, f, header=None, include_type=False,
+                 size=10, chunk_size=None, encoding='utf-8', **fmtparams):
+        self.strconv = strconv
+        self.f = f
+        self.header = header
+        self.include_type = include_type
+        self.size = size
+        self.chunk_size = chunk_size or CSV_CHUNK_SIZE
+        self.encoding = encoding
+        self.fmtparams = fmtparams
+        self.types = []
+        self.total = 0
+        self.changes = []
+        self._col_types = []
+
+    def __repr__(self):
+        return '<{0}: {1} rows>'.format(self.__class__.__name__, self.total)
+
+    def __iter__(self):
+        for chunk in self.chunks():
+            for row in chunk:
+                yield row
+
+    def _detect_header(self, rows):
+        if len(rows) < 2 or not all(rows[0]):
+            return False
+        infer = self.strconv.infer
+        if any(infer(s) is not None for s in rows[0]):
+            return False
+        for info in self.strconv.infer_matrix(rows[1:]):
+            t = info.inferred_col_type(outliers=True)[0][0]
+            if t not in ('string', 'empty'):
+                return True
+        return False
+
+    def _update_types(self, start):
+        for j, info in enumerate(self.types):
+            info.set_total(self.total)
+            t = None
+            if info.types:
+                t = info.inferred_col_type(outliers=True)[0][0]
+            if j == len(self._col_types):
+                self._col_types.append(t)
+            elif self._col_types[j] != t:
+                self.changes.append((start, j, self._col_types[j], t))
+                self._col_types[j] = t
+
+    def _convert_rows(self, rows, start, k=0):
+        strconv = self.strconv
+        strconv._infer_rows(self.types, rows, start, k)
+        self.total += len(rows)
+        self._update_types(start)
+
+        include_type = self.include_type
+        plan = self._plan()
+        out = []
+        for row in rows:
+            values = []
+            for j, s in enumerate(row):
+                v, t = self._convert_cell(s, *plan[j])
+                values.append((v, t) if include_type else v)
+            out.append(tuple(values))
+        return out
+
+    def _plan(self):
+        funcs = self.strconv._funcs
+        return [(t, funcs.get(t)) for t in self._col_types]
+
+    def _convert_cell(self, s, t, func):
+        # Converts `s` with the converter of its column's type `t`, or else
+        # with the full chain, lifting the value to `t` where possible.
+        v = NOMATCH if func is None else func(s)
+        if v is not NOMATCH:
+            return v, t
+        strconv = self.strconv
+        if t == 'string':
+            none = strconv._funcs.get('none')
+            if none is None or none(s) is NOMATCH:
+                return s, None
+        v, found = strconv.convert(s, include_type=True)
+        lifted = lift(v, found, t) if found else NOMATCH
+        if lifted is NOMATCH:
+            return v, found
+        return lifted, t
+
+    def retype(self, rows, raw, start):
+        """Returns `rows`, converted rows the first of which is row
+        `start`, with the cells of the columns whose type changed after
+        them converted again from the `raw` rows they were read from, see
+        `chunks`."""
+        include_type = self.include_type
+        plan = self._plan()
+        out = []
+        for i, (row, source) in enumerate(zip(rows, raw), start):
+            cols = set(j for r, j, _, _ in self.changes if r > i)
+            if not cols:
+                out.append(row)
+                continue
+            values = list(row)
+            for j in cols:
+                if j < len(values):
+                    v, t = self._convert_cell(source[j], *plan[j])
+                    values[j] = (v, t) if include_type else v
+            out.append(tuple(values))
+        return out
+
+    def chunks(self, convert=True, n=None, raw=False):
+        """Yields lists of converted rows, or lists of the raw rows when
+        `convert` is false, in which case the types are inferred the same
+        way `infer_matrix` does. Reads at most `n` rows if given. With
+        `raw`, converted rows are yielded along with the raw rows, as
+        `retype` needs them."""
+        f = self.f
+        close = isinstance(f, (str, bytes, os.PathLike))
+        if close:
+            f = open(f, newline='', encoding=self.encoding)
+
+        strconv = self.strconv
+        k = strconv._vector_prefix(None)
+
+        try:
+            reader = csv.reader(f, **self.fmtparams)
+            first = True
+
+            while not n or self.total < n:
+                rows = list(islice(reader, self.chunk_size))
+                if not rows:
+                    break
+
+                if first:
+                    first = False
+                    header = self.header
+                    if header is None:
+                        header = self._detect_header(rows)
+                    if header is True:
+                        self.header = rows.pop(0)
+                    elif header is False:
+                        self.header = None
+                if n:
+                    rows = rows[:n - self.total]
+                if not rows:
+                    continue
+
+                width = max(len(row) for row in rows)
+                while len(self.types) < width:
+                    self.types.append(Types(size=self.size))
+
+                start = self.total
+                if convert:
+                    converted = self._convert_rows(rows, start, k)
+                    rows = (converted, rows) if raw else converted
+                else:
+                    strconv._infer_rows(self.types, rows, start, k)
+                    self.total += len(rows)
+                    self._update_types(start)
+                yield rows
+        finally:
+            if close:
+                f.close()
+
 
 # Built-in converters
 
-# Use dateutil for more robust parsing
-try:
-    from dateutil.parser import parse as duparse
-except ImportError:
-    import warnings
-    warnings.warn('python-dateutil is not installed. As of version 0.5, '
-                  'this will be a hard dependency of strconv for'
-                  'datetime parsing. Without it, only a limited set of '
-                  'datetime formats are supported without timezones.')
-    duparse = None
+# Use dateutil for more robust parsing. It is only imported the first time
+# a date is converted to keep `import strconv` fast.
+_duparse = False
+
+
+def _dateutil():
+    global _duparse
+    if _duparse is False:
+        try:
+            from dateutil.parser import parse as duparse
+        except ImportError:
+            import warnings
+            warnings.warn('python-dateutil is not installed. As of version '
+                          '0.5, this will be a hard dependency of strconv '
+                          'for datetime parsing. Without it, only a limited '
+                          'set of datetime formats are supported without '
+                          'timezones.')
+            duparse = None
+        _duparse = duparse
+    return _duparse
+
 
 CORE_DATE_FORMATS = (
     '%Y-%m-%d',
@@ -258,97 +2929,763 @@ TIME_FORMATS = (
 
 DATE_TIME_SEPS = (' ', 'T')
 
-true_re = re.compile(r'^(t(rue)?|yes)$', re.I)
-false_re = re.compile(r'^(f(alse)?|no)$', re.I)
+# Strips the group names from strptime patterns so several can be combined
+_group_name_re = re.compile(r'\(\?P<[^>]+>')
 
+# Patterns of the strptime fallback, matching any string and the first
+# format respectively
+_any_re = re.compile('')
+_first_re = re.compile('(?P<f0>)')
 
-def convert_none(s):
+# Directives whose patterns depend on the LC_TIME locale
+_localized_re = re.compile(r'%[aAbBcpxX]')
+
+
+class FormatEngine(object):
+    """Precompiled matcher for an ordered sequence of strptime formats.
+
+    All formats are folded into a single anchored regex, so a string is
+    routed to the first format that can possibly match in one pass and
+    non-matching strings are rejected without calling `strptime`. The
+    value itself is still produced by `datetime.strptime`, which keeps
+    the results identical to trying each format in turn.
+    """
+
+    def __init__(self, formats):
+        self.formats = tuple(formats)
+        # Like `_strptime`, formats with localized names are compiled
+        # again when the LC_TIME locale changes.
+        self._localized = any(_localized_re.search(f) for f in self.formats)
+        self._lang = None
+        self._build()
+
+    def _build(self):
+        if self._localized and _getlang is not None:
+            self._lang = _getlang()
+        try:
+            self._compile()
+        except Exception:
+            # The internals of `_strptime` changed. Every string is then a
+            # candidate for every format and parsed by strptime alone.
+            self._patterns = [_any_re] * len(self.formats)
+            self._regex = _first_re
+
+    def _compile(self):
+        time_re = TimeRE()
+        self._patterns = []
+        alternatives = []
+
+        for i, f in enumerate(self.formats):
+            pattern = _group_name_re.sub('(?:', time_re.pattern(f))
+            self._patterns.append(re.compile(pattern + r'\Z', re.I))
+            alternatives.append('(?P<f{0}>{1})'.format(i, pattern))
+
+        self._regex = re.compile(r'(?:{0})\Z'.format('|'.join(alternatives)),
+                                 re.I)
+
+    def __repr__(self):
+        return '<{0}: {1} formats>'.format(self.__class__.__name__,
+                                           len(self.formats))
+
+    def match(self, s):
+        """Returns the index of the first format whose pattern matches `s`
+        or -1 if there is none."""
+        if self._localized and _getlang is not None and \
+                _getlang() != self._lang:
+            self._build()
+        m = self._regex.match(s)
+        if m is None:
+            return -1
+        return int(m.lastgroup[1:])
+
+    def lookup(self, s):
+        """Returns a `(datetime, format)` pair for the first format that
+        parses `s`, or None if none does."""
+        first = self.match(s)
+        if first < 0:
+            return None
+
+        formats = self.formats
+        patterns = self._patterns
+
+        # The pattern is only a pre-screen, values such as Feb 30 still
+        # fail in strptime and fall through to the next candidate format.
+        for i in range(first, len(formats)):
+            if i != first and patterns[i].match(s) is None:
+                continue
+            try:
+                return datetime.strptime(s, formats[i]), formats[i]
+            except ValueError:
+                pass
+        return None
+
+    def parse(self, s):
+        """Same as `lookup`, but raises `ValueError` if no format parses
+        `s`."""
+        result = self.lookup(s)
+        if result is None:
+            raise ValueError
+        return result
+
+
+_engines = {}
+
+
+def compile_formats(formats):
+    """Returns a cached `FormatEngine` for the sequence of formats."""
+    formats = tuple(formats)
+    engine = _engines.get(formats)
+    if engine is None:
+        engine = _engines[formats] = FormatEngine(formats)
+    return engine
+
+
+class AdaptiveFormats(object):
+    """Format sequence that learns from the values it parses.
+
+    The format that matched last is tried first, followed by the other
+    formats that have matched, most hits first, before falling back to
+    the full `FormatEngine`. Columns almost always use a single format,
+    so most values are parsed by the first `strptime` call. Ambiguous
+    strings resolve to the learned format rather than the first one in
+    the original sequence.
+    """
+
+    def __init__(self, formats):
+        self.engine = compile_formats(formats)
+        self._index = {f: i for i, f in enumerate(self.engine.formats)}
+        self.hits = Counter()
+        self._learned = []
+
+    def __repr__(self):
+        return '<{0}: {1}>'.format(self.__class__.__name__,
+                                   ', '.join(self._learned))
+
+    def order(self):
+        """Returns the formats in the order they are currently tried."""
+        learned = set(self._learned)
+        return self._learned + [f for f in self.engine.formats
+                                if f not in learned]
+
+    def reset(self):
+        self.hits.clear()
+        self._learned = []
+
+    def _hit(self, f):
+        hits = self.hits
+        hits[f] += 1
+        if not self._learned or self._learned[0] != f:
+            others = sorted((g for g in hits if g != f),
+                            key=hits.__getitem__, reverse=True)
+            self._learned = [f] + others
+
+    def lookup(self, s):
+        patterns = self.engine._patterns
+        for f in self._learned:
+            if patterns[self._index[f]].match(s) is None:
+                continue
+            try:
+                dt = datetime.strptime(s, f)
+            except ValueError:
+                continue
+            self._hit(f)
+            return dt, f
+
+        result = self.engine.lookup(s)
+        if result is not None:
+            self._hit(result[1])
+        return result
+
+    def parse(self, s):
+        result = self.lookup(s)
+        if result is None:
+            raise ValueError
+        return result
+
+
+def datetime_formats(date_formats=DATE_FORMATS, time_formats=TIME_FORMATS,
+                     seps=DATE_TIME_SEPS):
+    """Returns every date/time format combination in the order
+    `convert_datetime` tries them."""
+    return tuple('{0}{1}{2}'.format(df, sep, tf)
+                 for df in date_formats
+                 for tf in time_formats
+                 for sep in seps)
+
+
+# Spellings accepted by `convert_bool`, matched casefolded. A single
+# trailing newline is allowed as well, as `true_re` and `false_re` do.
+_bool_tokens = {
+    't': True, 'true': True, 'yes': True,
+    'f': False, 'false': False, 'no': False,
+}
+
+# dateutil is only tried first for datetimes before Python 3.5, where a
+# midnight `time` is false. Comparing `sys.version` as a string, as this
+# check once did, also sent Python 3.10 and later down that path, which
+# turned every string dateutil parses, dates included, into a datetime.
+_dateutil_datetimes = sys.version_info < (3, 5)
+
+# Compiled on first use, see `__getattr__` for `true_re` and `false_re`
+_bool_res = None
+
+
+def _bool_patterns():
+    global _bool_res
+    if _bool_res is None:
+        _bool_res = (re.compile(r'^(t(rue)?|yes)$', re.I),
+                     re.compile(r'^(f(alse)?|no)$', re.I))
+    return _bool_res
+
+
+# ISO 8601 in the extended format. The strptime formats only overlap on
+# naive date times with whole seconds, for which the results are equal.
+_iso_date_re = re.compile(r'([0-9]{4})-([0-9]{2})-([0-9]{2})\Z')
+_iso_datetime_re = re.compile(
+    r'([0-9]{4})-([0-9]{2})-([0-9]{2})[T ]([0-9]{2}):([0-9]{2})'
+    r'(?::([0-9]{2})(?:[.,]([0-9]{1,6}))?)?'
+    r'(?:(Z)|([+-])([0-9]{2}):?([0-9]{2}))?\Z')
+
+
+def try_iso_datetime(s):
+    m = _iso_datetime_re.match(s)
+    if m is None:
+        return NOMATCH
+    (year, month, day, hour, minute, second, fraction, utc, sign, hours,
+     minutes) = m.groups()
+
+    tz = None
+    if utc:
+        tz = timezone.utc
+    elif sign:
+        offset = timedelta(hours=int(hours), minutes=int(minutes))
+        if offset >= timedelta(days=1):
+            return NOMATCH
+        tz = timezone(-offset if sign == '-' else offset)
+    try:
+        return datetime(int(year), int(month), int(day), int(hour),
+                        int(minute), int(second or 0),
+                        int(fraction.ljust(6, '0')) if fraction else 0, tz)
+    except ValueError:
+        return NOMATCH
+
+
+def try_iso_date(s):
+    m = _iso_date_re.match(s)
+    if m is None:
+        return NOMATCH
+    try:
+        return date(*map(int, m.groups()))
+    except ValueError:
+        return NOMATCH
+
+
+# Strings `int` and `float` may accept. Anything else is rejected without
+# raising, `int` and `float` still decide the rest.
+_int_re = re.compile(r'\s*[+-]?\d[\d_]*\s*\Z')
+_float_re = re.compile(r'\s*[+-]?(?:[\d_]*\.?[\d_]*(?:e[+-]?[\d_]+)?|'
+                       r'inf(?:inity)?|nan)\s*\Z', re.I)
+
+
+def try_none(s):
     if s is None or s == 'None' or s == '':
         return None
-    raise ValueError
+    return NOMATCH
 
 
-def convert_int(s):
-    return int(s)
+def try_int(s):
+    if _int_re.match(s) is None:
+        return NOMATCH
+    try:
+        return int(s)
+    except ValueError:
+        return NOMATCH
 
 
-def convert_float(s):
-    return float(s)
+def try_float(s):
+    if _float_re.match(s) is None:
+        return NOMATCH
+    try:
+        return float(s)
+    except ValueError:
+        return NOMATCH
 
 
-def convert_bool(s):
-    if true_re.match(s):
-        return True
-    if false_re.match(s):
-        return False
-    raise ValueError
+def try_bool(s):
+    # Longer strings cannot casefold to a token
+    if len(s) > 6:
+        return NOMATCH
+    v = _bool_tokens.get(s.casefold(), NOMATCH)
+    if v is NOMATCH and s[-1:] == '\n':
+        v = _bool_tokens.get(s[:-1].casefold(), NOMATCH)
+    return v
+
 
+def try_datetime(s, date_formats=DATE_FORMATS, time_formats=TIME_FORMATS,
+                 formats=None):
+    v = try_iso_datetime(s)
+    if v is not NOMATCH:
+        return v
 
-def convert_datetime(s, date_formats=DATE_FORMATS, time_formats=TIME_FORMATS):
-    if sys.version < '3.5':
+    if _dateutil_datetimes:
+        duparse = _dateutil()
         if duparse:
             try:
                 dt = duparse(s)
                 if dt.time():
                     return duparse(s)
-            except TypeError:  # parse may throw this in py3
-                raise ValueError
-
-    for df in date_formats:
-        for tf in time_formats:
-            for sep in DATE_TIME_SEPS:
-                f = '{0}{1}{2}'.format(df, sep, tf)
-                try:
-                    return datetime.strptime(s, f)
-                except ValueError:
-                    pass
-    raise ValueError
-
-
-def convert_date(s, date_formats=DATE_FORMATS):
+            except (TypeError, ValueError):  # parse may throw TypeError
+                return NOMATCH
+
+    # Every default time format has a colon
+    if time_formats is TIME_FORMATS and ':' not in s:
+        return NOMATCH
+
+    if formats is None:
+        key = (tuple(date_formats), tuple(time_formats))
+        formats = _engines.get(key)
+        if formats is None:
+            combined = datetime_formats(date_formats, time_formats)
+            formats = _engines[key] = compile_formats(combined)
+    result = formats.lookup(s)
+    if result is None:
+        return NOMATCH
+    return result[0]
+
+
+def try_date(s, date_formats=DATE_FORMATS, formats=None):
+    v = try_iso_date(s)
+    if v is not NOMATCH:
+        return v
+
+    duparse = _duparse if _duparse is not False else _dateutil()
     if duparse:
+        # dateutil has no non-raising interface
         try:
             return duparse(s).date()
-        except TypeError:  # parse may throw this in py3
-            raise ValueError
+        except (TypeError, ValueError):  # parse may throw TypeError
+            return NOMATCH
 
-    for f in date_formats:
-        try:
-            return datetime.strptime(s, f).date()
-        except ValueError:
-            pass
-    raise ValueError
+    if formats is None:
+        formats = compile_formats(date_formats)
+    result = formats.lookup(s)
+    if result is None:
+        return NOMATCH
+    return result[0].date()
 
 
-def convert_time(s, time_formats=TIME_FORMATS):
-    for f in time_formats:
-        try:
-            return datetime.strptime(s, f).time()
-        except ValueError:
-            pass
-    raise ValueError
+def try_time(s, time_formats=TIME_FORMATS, formats=None):
+    if time_formats is TIME_FORMATS and ':' not in s:
+        return NOMATCH
+    if formats is None:
+        formats = compile_formats(time_formats)
+    result = formats.lookup(s)
+    if result is None:
+        return NOMATCH
+    return result[0].time()
 
 
-# Initialize default instance and make accessible at the module level
-# Note: Order matters!
-default_strconv = Strconv(converters=[
+# The raising converters, kept for direct use and registration. Strconv
+# calls the `try_convert` twin of each.
+
+def convert_none(s):
+    v = try_none(s)
+    if v is NOMATCH:
+        raise ValueError
+    return v
+
+
+def convert_int(s):
+    return int(s)
+
+
+def convert_float(s):
+    return float(s)
+
+
+def convert_bool(s):
+    v = try_bool(s)
+    if v is NOMATCH:
+        raise ValueError
+    return v
+
+
+def convert_datetime(s, date_formats=DATE_FORMATS, time_formats=TIME_FORMATS,
+                     formats=None):
+    v = try_datetime(s, date_formats, time_formats, formats)
+    if v is NOMATCH:
+        raise ValueError
+    return v
+
+
+def convert_date(s, date_formats=DATE_FORMATS, formats=None):
+    v = try_date(s, date_formats, formats)
+    if v is NOMATCH:
+        raise ValueError
+    return v
+
+
+def convert_time(s, time_formats=TIME_FORMATS, formats=None):
+    v = try_time(s, time_formats, formats)
+    if v is NOMATCH:
+        raise ValueError
+    return v
+
+
+def convert_iso_datetime(s):
+    v = try_iso_datetime(s)
+    if v is NOMATCH:
+        raise ValueError
+    return v
+
+
+def convert_iso_date(s):
+    v = try_iso_date(s)
+    if v is NOMATCH:
+        raise ValueError
+    return v
+
+
+convert_none.try_convert = try_none
+convert_int.try_convert = try_int
+convert_float.try_convert = try_float
+convert_bool.try_convert = try_bool
+convert_datetime.try_convert = try_datetime
+convert_date.try_convert = try_date
+convert_time.try_convert = try_time
+convert_iso_datetime.try_convert = try_iso_datetime
+convert_iso_date.try_convert = try_iso_date
+
+
+def __getattr__(name):
+    # Lazily loaded module attributes
+    if name == 'duparse':
+        return _dateutil()
+    if name in ('true_re', 'false_re'):
+        return _bool_patterns()[name == 'false_re']
+    raise AttributeError('module {0!r} has no attribute {1!r}'.format(
+        __name__, name))
+
+
+# Format based converters and the formats they try, used to give each
+# adaptive Strconv instance its own learned order.
+_adaptive_formats = {
+    convert_time: lambda: TIME_FORMATS,
+    convert_datetime: datetime_formats,
+    convert_date: lambda: DATE_FORMATS,
+}
+
+
+# Prescreen predicates for the built-in converters. Each one only rules out
+# strings the converter can never accept.
+
+_int_chars = CHAR_DIGIT | CHAR_SIGN | CHAR_SPACE | CHAR_UNDERSCORE
+_float_chars = _int_chars | CHAR_DOT | CHAR_ALPHA
+
+
+def may_match_int(mask, n):
+    return mask & CHAR_DIGIT and not mask & ~_int_chars
+
+
+def may_match_float(mask, n):
+    # Letters are allowed for exponents, nan and inf
+    return mask & (CHAR_DIGIT | CHAR_ALPHA) and not mask & ~_float_chars
+
+
+def may_match_bool(mask, n):
+    # 'false' and a trailing newline at most
+    return n <= 6 and mask & CHAR_ALPHA and not mask & ~(CHAR_ALPHA |
+                                                         CHAR_SPACE)
+
+
+def may_match_time(mask, n):
+    # All time formats separate the hours and minutes with a colon
+    return mask & CHAR_DIGIT and mask & CHAR_COLON
+
+
+def may_match_date(mask, n):
+    # dateutil also accepts month and day names on their own
+    return mask & (CHAR_DIGIT | CHAR_ALPHA)
+
+
+class NumberConverter(object):
+    """Converts numbers written with thousands separators, a custom decimal
+    mark, accounting negatives such as "(12.50)" and percentages, which are
+    divided by 100. Strings are validated by a single regular expression
+    before `int` or `float` is called on the normalized string.
+
+    Without `kind`, strings with no fraction, exponent or percent sign are
+    converted to integers and the rest to floats. With `kind='int'` only
+    integers are accepted, with `kind='float'` all values are floats.
+    `strict` rejects underscores between digits, "nan" and "inf".
+
+    Register it ahead of the date converters, which would otherwise read
+    "1,234" as a date, and after the built-in ones, so bulk inference keeps
+    deciding plain numbers:
+
+        register_converter('number', NumberConverter(thousands='.',
+                                                     decimal=','),
+                           priority=4)
+    """
+    def __init__(self, thousands=',', decimal='.', percent=True,
+                 accounting=True, strict=False, kind=None):
+        if kind not in (None, 'int', 'float'):
+            raise ValueError('kind must be None, "int" or "float"')
+        if not decimal:
+            raise ValueError('a decimal mark is required')
+        if thousands == decimal:
+            raise ValueError('the thousands separator and decimal mark '
+                             'must differ')
+        if any(c.isdecimal() for c in (thousands or '') + decimal):
+            raise ValueError('separators cannot contain digits')
+
+        self.thousands = thousands or None
+        self.decimal = decimal
+        self.percent = percent and kind != 'int'
+        self.accounting = accounting
+        self.strict = strict
+        self.kind = kind
+        self._regex = self._compile()
+
+        chars = CHAR_DIGIT | CHAR_SIGN | CHAR_SPACE
+        if kind != 'int':
+            chars |= classify(decimal) | CHAR_ALPHA
+        if self.thousands:
+            chars |= classify(self.thousands)
+        if not strict:
+            chars |= CHAR_UNDERSCORE
+        if self.percent or accounting:
+            chars |= CHAR_OTHER
+        self._chars = chars
+        # Letters without digits can only spell nan, inf or infinity
+        self._words = kind != 'int' and not strict
+
+    def __repr__(self):
+        return '<{0}: thousands={1!r} decimal={2!r}>'.format(
+            self.__class__.__name__, self.thousands, self.decimal)
+
+    def _compile(self):
+        digits = r'\d+' if self.strict else r'\d+(?:_\d+)*'
+        integer = digits
+        if self.thousands:
+            integer = r'\d{{1,3}}(?:{0}\d{{3}})+|{1}'.format(
+                re.escape(self.thousands), digits)
+        number = '(?:{0})'.format(integer)
+        if self.kind != 'int':
+            d = re.escape(self.decimal)
+            number = (r'(?:{0}(?:{1}(?:{2})?)?|{1}{2})'
+                      r'(?:[eE][+-]?\d+)?').format(number, d, digits)
+        pct = r'(?P<{0}>\s*%)?' if self.percent else ''
+
+        signed = r'(?P<sign>[+-])?(?P<num>{0}'.format(number)
+        if self.kind != 'int' and not self.strict:
+            signed += r'|nan|inf(?:inity)?'
+        signed += ')' + pct.format('pct')
+        pattern = signed
+        if self.accounting:
+            pattern = r'{0}|\(\s*(?P<neg>{1})\s*\){2}'.format(
+                signed, number, pct.format('neg_pct'))
+        return re.compile(r'\s*(?:{0})\s*\Z'.format(pattern), re.I)
+
+    def __call__(self, s):
+        v = self.try_convert(s)
+        if v is NOMATCH:
+            raise ValueError('not a number: {0!r}'.format(s))
+        return v
+
+    def try_convert(self, s):
+        m = self._regex.match(s)
+        if m is None:
+            return NOMATCH
+        groups = m.groupdict()
+
+        num = groups['num']
+        sign = groups['sign'] or ''
+        if num is None:
+            num = groups['neg']
+            sign = '-'
+        if self.thousands:
+            num = num.replace(self.thousands, '')
+        if self.decimal != '.':
+            num = num.replace(self.decimal, '.')
+
+        if groups.get('pct') or groups.get('neg_pct'):
+            return float(sign + num) / 100
+        if self.kind == 'float' or not num.replace('_', '').isdigit():
+            return float(sign + num)
+        return int(sign + num)
+
+    def may_match(self, mask, n):
+        if not n or mask & ~self._chars:
+            return False
+        if mask & CHAR_ALPHA and not mask & CHAR_DIGIT:
+            if not self._words:
+                return False
+            # Without padding, the word is all but the sign and percent
+            if not mask & CHAR_SPACE:
+                n -= bool(mask & CHAR_SIGN) + bool(mask & CHAR_OTHER)
+                return n in (3, 8)
+        return True
+
+
+# Null spellings for `Vocabulary.nulls`. The empty string and "None" are
+# left to the built-in none converter.
+NULL_TOKENS = ('null', 'nil', 'n/a', 'na', '#n/a', '-', '--', 'nan', '\\N')
+
+# True and false spellings for `Vocabulary.booleans` by language
+BOOL_TOKENS = {
+    'en': (('true', 't', 'yes', 'y', 'on'), ('false', 'f', 'no', 'n', 'off')),
+    'de': (('wahr', 'ja', 'j'), ('falsch', 'nein')),
+    'fr': (('vrai', 'oui', 'o'), ('faux', 'non')),
+    'es': (('verdadero', 'sí', 'si', 's'), ('falso', 'no', 'n')),
+    'it': (('vero', 'sì', 'si', 's'), ('falso', 'no', 'n')),
+    'nl': (('waar', 'ja', 'j'), ('onwaar', 'nee', 'n')),
+    'pt': (('verdadeiro', 'sim', 's'), ('falso', 'não', 'nao', 'n')),
+}
+
+
+class Vocabulary(object):
+    """Converts a fixed set of tokens, such as null or boolean spellings,
+    to their values. `tokens` maps each token to its value and matching is
+    case-insensitive: strings are casefolded and looked up in a dict built
+    once, so checking a vocabulary costs one lookup whatever its size.
+    Strings are first passed to the `base` converter if given.
+
+        install_vocabulary('null', Vocabulary.nulls())
+    """
+    __slots__ = ('table', 'base', '_base', '_maxlen', '_chars', '_overlap')
+
+    def __init__(self, tokens, base=None):
+        table = {}
+        for token, value in dict(tokens).items():
+            key = token.casefold()
+            if table.get(key, value) != value:
+                raise ValueError('token {0!r} has conflicting values'.format(
+                    token))
+            table[key] = value
+        if not table:
+            raise ValueError('a vocabulary needs at least one token')
+        self.table = table
+        # Casefolding never shortens a string
+        self._maxlen = max(len(key) for key in table)
+        self._chars = 0
+        for key in table:
+            self._chars |= classify(key)
+        self._overlap = min(_builtin_overlap(key) for key in table)
+        self.base = base
+        self._base = None
+        if base is not None:
+            self._base = getattr(base, 'try_convert', None) or _Adapter(base)
+
+    @classmethod
+    def nulls(cls, tokens=NULL_TOKENS):
+        """Returns a vocabulary converting `tokens` to None."""
+        return cls(dict.fromkeys(tokens))
+
+    @classmethod
+    def booleans(cls, languages=('en',), digits=False):
+        """Returns a vocabulary of the true and false spellings of
+        `languages`, keys of `BOOL_TOKENS`, and of "1" and "0" if `digits`
+        is true."""
+        tokens = {}
+        for language in languages:
+            if language not in BOOL_TOKENS:
+                raise KeyError('unknown language: {0}'.format(language))
+            trues, falses = BOOL_TOKENS[language]
+            tokens.update(dict.fromkeys(trues, True))
+            tokens.update(dict.fromkeys(falses, False))
+        if digits:
+            tokens.update({'1': True, '0': False})
+        return cls(tokens)
+
+    def __repr__(self):
+        return '<{0}: {1} tokens>'.format(self.__class__.__name__,
+                                          len(self.table))
+
+    def __len__(self):
+        return len(self.table)
+
+    def __contains__(self, s):
+        return self.try_convert(s) is not NOMATCH
+
+    def __call__(self, s):
+        v = self.try_convert(s)
+        if v is NOMATCH:
+            raise ValueError
+        return v
+
+    def try_convert(self, s):
+        if self._base is not None:
+            v = self._base(s)
+            if v is not NOMATCH:
+                return v
+        if len(s) > self._maxlen:
+            return NOMATCH
+        return self.table.get(s.casefold(), NOMATCH)
+
+    def may_match(self, mask, n):
+        if self.base is not None:
+            may_match = getattr(self.base, 'may_match', None)
+            if may_match is None or may_match(mask, n):
+                return True
+        return n <= self._maxlen and not mask & ~self._chars
+
+
+def _builtin_overlap(key):
+    # Index in `_builtin_order` of the first built-in converter accepting
+    # the casefolded token, which bulk paths would then decide without
+    # consulting a vocabulary ahead of it.
+    if key in ('', 'none'):
+        return 0
+    for i, func in enumerate((try_int, try_float, try_bool), 1):
+        if func(key) is not NOMATCH:
+            return i
+    return len(_builtin_order)
+
+
+# The built-in converters in the order bulk paths emulate
+_builtin_order = (
     ('none', convert_none),
     ('int', convert_int),
     ('float', convert_float),
     ('bool', convert_bool),
-    ('time', convert_time),
-    ('datetime', convert_datetime),
-    ('date', convert_date),
+)
+
+
+# Initialize default instance and make accessible at the module level
+# Note: Order matters!
+default_strconv = Strconv(converters=[
+    ('none', convert_none),
+    ('int', convert_int, may_match_int),
+    ('float', convert_float, may_match_float),
+    ('bool', convert_bool, may_match_bool),
+    ('time', convert_time, may_match_time),
+    ('datetime', convert_datetime, may_match_time),
+    ('date', convert_date, may_match_date),
 ])
 
 register_converter = default_strconv.register_converter
 unregister_converter = default_strconv.unregister_converter
+install_vocabulary = default_strconv.install_vocabulary
 get_converter = default_strconv.get_converter
 
 convert = default_strconv.convert
 convert_series = default_strconv.convert_series
 convert_matrix = default_strconv.convert_matrix
+convert_matrix_shared = default_strconv.convert_matrix_shared
+compile_plan = default_strconv.compile_plan
 
 infer = default_strconv.infer
 infer_series = default_strconv.infer_series
 infer_matrix = default_strconv.infer_matrix
+infer_matrix_compact = default_strconv.infer_matrix_compact
+
+convert_column = default_strconv.convert_column
+infer_column = default_strconv.infer_column
+
+convert_csv = default_strconv.convert_csv
+infer_csv = default_strconv.infer_csv
+infer_file = default_strconv.infer_file
+
+aconvert_series = default_strconv.aconvert_series
+ainfer_series = default_strconv.ainfer_series
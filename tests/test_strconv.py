@@ -1,10 +1,24 @@
 #!/usr/bin/env python
 
+import asyncio
+import io
+import os
+import pickle
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+import tempfile
 import unittest
 import strconv
-from datetime import datetime, date, time
+from array import array
+from datetime import datetime, date, time, timezone
 from dateutil.tz import tzoffset
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 class StrconvTestCase(unittest.TestCase):
     def setUp(self):
@@ -39,6 +53,187 @@ class StrconvTestCase(unittest.TestCase):
                           'name', None)
 
 
+class ThreadingTestCase(unittest.TestCase):
+    def test_snapshot(self):
+        s = strconv.default_strconv.copy()
+        dispatch = s._dispatch
+        s.register_converter('hex', lambda v: int(v, 16), priority=0)
+        self.assertIsNot(s._dispatch, dispatch)
+        self.assertEqual(dispatch.order[0], 'none')
+        self.assertEqual(s._dispatch.order[0], 'hex')
+        self.assertEqual(s._builtin_prefix(), 0)
+
+    def test_concurrent_register(self):
+        s = strconv.default_strconv.copy()
+        s.set_cache(8)
+        done = []
+
+        def convert():
+            results = set()
+            while not done:
+                results.add(s.convert('10', include_type=True))
+            return results
+
+        with ThreadPoolExecutor(4) as executor:
+            futures = [executor.submit(convert) for _ in range(4)]
+            for i in range(200):
+                s.register_converter('hex', lambda v: int(v, 16),
+                                     priority=i % 2)
+                s.unregister_converter('hex')
+            done.append(True)
+            for future in futures:
+                self.assertLessEqual(future.result(),
+                                     {(10, 'int'), (16, 'hex')})
+
+
+class CacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.s = strconv.default_strconv.copy()
+        self.s.set_cache(2)
+
+    def test_cache(self):
+        self.assertEqual(self.s.convert('1'), 1)
+        self.assertEqual(self.s.convert('1', include_type=True), (1, 'int'))
+        self.assertEqual(self.s.convert('true'), True)
+        self.assertEqual(self.s.cache_info(), (1, 2, 2, 2))
+
+        # '1' was used last, so 'true' is evicted
+        self.s.convert('1')
+        self.s.convert('x')
+        self.assertEqual(list(self.s._cache), ['1', 'x'])
+        self.assertEqual(self.s.cache_info(), (2, 3, 2, 2))
+
+    def test_invalidate(self):
+        self.s.convert('1')
+        self.s.register_converter('float', strconv.convert_float,
+                                  priority=0)
+        self.assertEqual(self.s.cache_info(), (0, 0, 2, 0))
+        self.assertEqual(self.s.convert('1', include_type=True),
+                         (1.0, 'float'))
+        self.s.unregister_converter('float')
+        self.assertEqual(self.s.convert('1', include_type=True), (1, 'int'))
+
+    def test_disable(self):
+        self.s.set_cache(None)
+        self.s.convert('1')
+        self.assertEqual(self.s.cache_info(), (0, 0, None, 0))
+        self.assertEqual(strconv.default_strconv.cache_info().maxsize, None)
+
+
+class ProfileTestCase(unittest.TestCase):
+    def setUp(self):
+        self.s = strconv.default_strconv.copy()
+
+    def test_stats(self):
+        self.assertIsNone(self.s.profile_stats())
+        self.s.enable_profiling()
+        list(self.s.convert_series(['1', '1.5', 'x']))
+
+        stats = self.s.profile_stats()
+        self.assertEqual(stats['values'], 3)
+        self.assertEqual(stats['strings'], 1)
+        converters = stats['converters']
+        self.assertEqual(converters['none']['attempts'], 3)
+        self.assertEqual(converters['none']['misses'], 3)
+        self.assertEqual(converters['int']['hits'], 1)
+        self.assertEqual(converters['float']['attempts'], 2)
+        self.assertEqual(sum(converters['int']['histogram'].values()), 3)
+
+        self.s.reset_profile()
+        self.assertEqual(self.s.profile_stats()['values'], 0)
+
+    def test_disable(self):
+        self.s.enable_profiling()
+        self.s.disable_profiling()
+        self.assertNotIn('_search', vars(self.s))
+        self.s.convert('1')
+        self.assertIsNone(self.s.profile_stats())
+
+    def test_callback(self):
+        calls = []
+        self.s.enable_profiling(callback=calls.append, every=2)
+        list(self.s.convert_series(['1', '2', '3', '4', '5'], adaptive=True))
+        self.assertEqual([c['values'] for c in calls], [2, 4])
+        self.assertRaises(ValueError, self.s.enable_profiling, every=0)
+
+
+class PrescreenTestCase(unittest.TestCase):
+    def test_classify(self):
+        self.assertEqual(strconv.classify('12'), strconv.CHAR_DIGIT)
+        self.assertEqual(strconv.classify('-1.5'), strconv.CHAR_DIGIT |
+                         strconv.CHAR_SIGN | strconv.CHAR_DOT)
+        self.assertEqual(strconv.classify('5:40 PM'), strconv.CHAR_DIGIT |
+                         strconv.CHAR_COLON | strconv.CHAR_SPACE |
+                         strconv.CHAR_ALPHA)
+        self.assertEqual(strconv.classify('#'), strconv.CHAR_OTHER)
+        self.assertEqual(strconv.classify(''), 0)
+
+    def test_candidates(self):
+        s = strconv.default_strconv
+        self.assertEqual(s.candidates('hello'),
+                         ('none', 'float', 'bool', 'date'))
+        self.assertEqual(s.candidates('12'),
+                         ('none', 'int', 'float', 'date'))
+
+    def test_custom_predicate(self):
+        calls = []
+
+        def convert_hex(s):
+            calls.append(s)
+            return int(s, 16)
+
+        s = strconv.Strconv(prescreen=True)
+        s.register_converter('hex', convert_hex,
+                             may_match=lambda mask, n: n > 2)
+        self.assertEqual(s.convert('ff'), 'ff')
+        self.assertEqual(s.convert('0xff'), 255)
+        self.assertEqual(calls, ['0xff'])
+        self.assertRaises(ValueError, s.register_converter, 'hex',
+                          convert_hex, may_match=1)
+
+    def test_same_results(self):
+        s = strconv.default_strconv.copy()
+        s.prescreen = True
+        for v in ('hello', '1_000', ' 12 ', 'yes\n', 'March', '5:40 PM',
+                  '1e5', '-', '2013-03-01', 'March 4, 2013 5:40 PM'):
+            self.assertEqual(s.convert(v, include_type=True),
+                             strconv.convert(v, include_type=True))
+
+
+class AdaptiveTestCase(unittest.TestCase):
+    def setUp(self):
+        self.s = strconv.default_strconv.copy(adaptive=True)
+
+    def test_learn(self):
+        formats = self.s.formats['time']
+        self.assertEqual(self.s.convert('5:30 PM'), time(17, 30))
+        self.assertEqual(self.s.convert('6:15 AM'), time(6, 15))
+        self.assertEqual(formats.order()[0], '%I:%M %p')
+        self.assertEqual(formats.hits['%I:%M %p'], 2)
+        self.assertEqual(self.s.convert('15:30:40'), time(15, 30, 40))
+        self.assertEqual(formats.order()[:2], ['%H:%M:%S', '%I:%M %p'])
+
+        self.s.reset_formats()
+        self.assertEqual(formats.order(), list(strconv.TIME_FORMATS))
+
+    def test_same_results(self):
+        values = ['Mar 1, 2013 5:30:40 AM', 'Mar 2, 2013 5:30:40 AM',
+                  '2013-03-01 5:30:40 -0500', 'foo', '1:30']
+        self.assertEqual(list(self.s.convert_series(values)),
+                         list(strconv.convert_series(values)))
+        formats = self.s.formats['datetime']
+        self.assertEqual(formats.order()[:2], ['%Y-%m-%d %I:%M:%S %z',
+                                               '%b %d, %Y %I:%M:%S %p'])
+        self.assertEqual(formats.hits['%b %d, %Y %I:%M:%S %p'], 2)
+        self.assertEqual(strconv.default_strconv.formats, {})
+
+    def test_infer_matrix(self):
+        c0, c1 = strconv.infer_matrix([['5:30 PM', '1'], ['1:30', '2']],
+                                      adaptive=True)
+        self.assertEqual(c0.most_common(), [('time', 2)])
+        self.assertEqual(c1.most_common(), [('int', 2)])
+
+
 class ConvertTestCase(unittest.TestCase):
     def test_convert(self):
         self.assertEqual(strconv.convert('-3'), -3)
@@ -61,6 +256,651 @@ class ConvertTestCase(unittest.TestCase):
         self.assertEqual(list(strconv.convert_matrix([['+0.4']])), [(0.4,)])
 
 
+class PlanTestCase(unittest.TestCase):
+    rows = [['1', '1.5', 'a'], ['2', '', 'b'], ['x', '3', None],
+            ['4', 'None', 'c']]
+
+    def test_plan(self):
+        types = strconv.infer_matrix(self.rows)
+        plan = strconv.compile_plan(types)
+        self.assertEqual(plan.types, ('int', 'float', 'string'))
+        self.assertEqual(list(strconv.convert_matrix(self.rows, plan=plan)),
+                         list(strconv.convert_matrix(self.rows)))
+        self.assertEqual(list(plan.convert([['5', '6', 'd', '7']])),
+                         [(5, 6.0, 'd', 7)])
+        self.assertEqual(plan.convert_row(['1', '2'], include_type=True),
+                         ((1, 'int'), (2.0, 'float')))
+
+    def test_policies(self):
+        plan = strconv.compile_plan(['int', 'float', 'string'],
+                                    policy='none')
+        self.assertEqual(plan.convert_row(self.rows[2]), (None, 3.0, None))
+
+        plan = strconv.compile_plan(['int', 'float', 'string'],
+                                    policy='error')
+        rows = list(strconv.convert_matrix(self.rows, plan=plan))
+        self.assertEqual(rows[2], (None, 3.0, None))
+        self.assertEqual(plan.errors, [(2, 0, 'x')])
+
+        self.assertRaises(ValueError, strconv.compile_plan, ['int'],
+                          policy='drop')
+        self.assertRaises(KeyError, strconv.compile_plan, ['complex'])
+
+
+class ResumeTestCase(unittest.TestCase):
+    values = ['1', '2.5', 'x', '', '3', 'true', '4', '2.5']
+
+    def assertSameTypes(self, a, b):
+        self.assertEqual(a.total, b.total)
+        self.assertEqual(list(a.types), list(b.types))
+        for t in a.types:
+            self.assertEqual(a.types[t].count, b.types[t].count)
+            self.assertEqual(a.types[t].sample, b.types[t].sample)
+
+    def test_dict(self):
+        info = strconv.infer_series(self.values)
+        d = info.to_dict()
+        self.assertEqual(d['types'][0]['name'], 'int')
+        self.assertEqual(d['types'][0]['sample'][:2], [[0, '1'], [4, '3']])
+        self.assertSameTypes(strconv.Types.from_dict(d), info)
+
+    def test_bytes(self):
+        types = strconv.infer_matrix([['1', 'a'], ['2', '']])
+        loaded = strconv.load_types(strconv.dump_types(types))
+        for a, b in zip(loaded, types):
+            self.assertSameTypes(a, b)
+        info = types[0]
+        self.assertSameTypes(strconv.Types.from_bytes(info.to_bytes()), info)
+
+    def test_resume_series(self):
+        info = strconv.Types.from_dict(
+            strconv.infer_series(self.values[:3]).to_dict())
+        result = strconv.infer_series(self.values[3:], types=info)
+        self.assertIs(result, info)
+        self.assertSameTypes(result, strconv.infer_series(self.values))
+
+    def test_resume_matrix(self):
+        rows = [[v, v + '0'] for v in self.values]
+        types = strconv.infer_matrix(rows[:5])
+        strconv.infer_matrix(rows[5:], types=types)
+        for a, b in zip(types, strconv.infer_matrix(rows)):
+            self.assertSameTypes(a, b)
+
+
+class CompactTestCase(unittest.TestCase):
+    rows = [['1', 'a', None], ['2.5', 'b', '1'], ['3', 'a', 'x'],
+            ['t', 'c', '2'], ['', 'd', '3']]
+
+    def test_slots(self):
+        info = strconv.Types()
+        info.incr('int')
+        self.assertFalse(hasattr(info, '__dict__'))
+        self.assertFalse(hasattr(info.types['int'], '__dict__'))
+        self.assertEqual(info.size, strconv.DEFAULT_SAMPLE_SIZE)
+        self.assertEqual(info.types['int'].size, strconv.DEFAULT_SAMPLE_SIZE)
+
+    def test_infer_matrix_compact(self):
+        infos = strconv.infer_matrix_compact(self.rows)
+        self.assertEqual(len(infos), 3)
+        for c0, c1 in zip(infos, strconv.infer_matrix(self.rows)):
+            self.assertEqual(c0.most_common(), c1.most_common())
+            self.assertEqual(c0.inferred_col_type(), c1.inferred_col_type())
+            self.assertEqual(c0.total, 5)
+        self.assertEqual(infos[0].types['int'].sample, [])
+        self.assertEqual(infos.count(1, 'string'), 5)
+        self.assertEqual(len(strconv.infer_matrix_compact([])), 0)
+
+    def test_samples(self):
+        infos = strconv.infer_matrix_compact(self.rows, size=2)
+        self.assertEqual(infos[1].types['string'].sample,
+                         [(0, 'a'), (1, 'b')])
+
+    def test_new_type(self):
+        infos = strconv.TypeMatrix(2, ['int'])
+        infos.incr(0, 'int', 0)
+        infos.incr(1, 'float', 0)
+        infos.incr(0, 'float', 1, n=2)
+        self.assertEqual(infos[0].most_common(), [('float', 2), ('int', 1)])
+        self.assertEqual(infos[1].most_common(), [('float', 1)])
+        self.assertRaises(IndexError, infos.__getitem__, 2)
+
+
+class ColumnTestCase(unittest.TestCase):
+    def test_infer_column(self):
+        values = ['1', '', '2', 'None', '1']
+        c0 = strconv.infer_column(values)
+        self.assertEqual(c0.most_common(), [('int', 3), ('none', 2)])
+        self.assertEqual(c0.types['int'].sample, [(0, '1'), (2, '2')])
+        self.assertEqual(c0.types['int'].freq(), 0.6)
+
+        for values in (['1', '0.5', None, 'true'], ['1', '2'], [None]):
+            self.assertEqual(
+                strconv.infer_column(values).most_common(),
+                strconv.infer_series(values).most_common())
+
+        self.assertEqual(strconv.infer_column(values, n=1).total, 1)
+        self.assertEqual(strconv.infer_column([]), None)
+
+    def test_convert_column(self):
+        c0 = strconv.convert_column(['1', None, '-3'], use_numpy=False)
+        self.assertEqual(c0.type, 'int')
+        self.assertEqual(c0.values, array('q', [1, 0, -3]))
+        self.assertEqual(c0.nulls, bytearray([2]))
+        self.assertEqual(c0.tolist(), [1, None, -3])
+
+        c1 = strconv.convert_column(['1', '0.5', 'foo', '2', '0.1'],
+                                    use_numpy=False)
+        self.assertEqual(c1.type, 'float')
+        self.assertEqual(c1.values, array('d', [1.0, 0.5, 0.0, 2.0, 0.1]))
+        self.assertEqual(c1.errors, [2])
+        self.assertTrue(c1.is_null(2))
+
+        c2 = strconv.convert_column(['t', 'no'], use_numpy=False)
+        self.assertEqual(c2.tolist(), [True, False])
+
+        c3 = strconv.convert_column(['3/20/2013', ''], type='date')
+        self.assertEqual(c3.tolist(), [date(2013, 3, 20), None])
+        self.assertEqual(strconv.convert_column(['a', '']).tolist(),
+                         ['a', None])
+        self.assertRaises(KeyError, strconv.convert_column, ['1'], 'foo')
+        for t in ('empty', 'none'):
+            c4 = strconv.convert_column(['', None], type=t, use_numpy=False)
+            self.assertEqual((c4.type, c4.tolist()), (t, [None, None]))
+
+    def test_convert_column_reuse(self):
+        calls = []
+
+        def convert_date(s):
+            calls.append(s)
+            return strconv.convert_date(s)
+
+        s = strconv.Strconv()
+        s.register_converter('date', convert_date)
+        values = ['2013-03-01', '2013-03-02', '2013-03-03', 'x']
+        c0 = s.convert_column(values, use_numpy=False)
+        self.assertEqual(c0.type, 'date')
+        self.assertEqual(c0.tolist()[1:], [date(2013, 3, 2),
+                                           date(2013, 3, 3), None])
+        self.assertEqual(c0.errors, [3])
+        # Converted once while inferring and not retried
+        self.assertEqual(calls, values)
+
+        s.register_converter('int', strconv.convert_int, priority=0)
+        c1 = s.convert_column(['1', '2', '3.5'], n=2, use_numpy=False)
+        self.assertEqual(c1.type, 'int')
+        self.assertEqual(c1.errors, [2])
+
+    def test_lift(self):
+        c0 = strconv.convert_column(['2013-03-04', '2013-03-05 12:00',
+                                     '2013-03-06 13:00'], use_numpy=False)
+        self.assertEqual(c0.type, 'datetime')
+        self.assertEqual(c0.tolist()[0], datetime(2013, 3, 4))
+        self.assertEqual(c0.errors, [])
+        c1 = strconv.convert_column(['true', '1', '2'], use_numpy=False)
+        self.assertEqual((c1.type, c1.tolist()), ('int', [1, 1, 2]))
+        c2 = strconv.convert_column(['t', '1', '2'], type='float', n=1,
+                                    use_numpy=False)
+        self.assertEqual(c2.tolist(), [1.0, 1.0, 2.0])
+        self.assertEqual(repr(strconv.lift(True, 'bool', 'float')), '1.0')
+        rows = [['2013-03-04', 'true'], ['2013-03-05 12:00', '2'],
+                ['2013-03-06 13:00', '3']]
+        types = strconv.infer_matrix(rows)
+        plan = strconv.compile_plan(types, policy='error')
+        self.assertEqual(plan.convert_row(rows[0]),
+                         (datetime(2013, 3, 4), 1))
+        self.assertEqual(plan.errors, [])
+        with strconv.convert_matrix_shared(rows, types,
+                                           use_numpy=False) as shared:
+            self.assertEqual(shared.tolist(0)[0], datetime(2013, 3, 4))
+            self.assertEqual(shared.tolist(1), [1, 2, 3])
+            self.assertEqual(shared[0].errors, [])
+        self.assertIs(strconv.lift(date(2013, 3, 4), 'date', 'int'),
+                      strconv.NOMATCH)
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_convert_column_numpy(self):
+        c0 = strconv.convert_column(['1', None, '-3'])
+        self.assertEqual(c0.values.dtype, numpy.int64)
+        self.assertEqual(c0.nulls.tolist(), [False, True, False])
+        self.assertEqual(c0.tolist(), [1, None, -3])
+
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class VectorizeTestCase(unittest.TestCase):
+    values = ['1', ' -2 ', '1_0', '1.5', '.5', '.', '--1', 'nan', 'TRUE',
+              'no', 'yes\n', '', None, 'None', 'hello', '5:40 PM', '1\x00',
+              '3\x00\x85', '1\x00\xa0', ' +0\x00 ', '0.7\x00\n']
+
+    def summary(self, info):
+        return ([(t, i.count, i.sample) for t, i in info.types.items()],
+                info.inferred_col_type())
+
+    def test_infer_series(self):
+        values = self.values * 3
+        self.assertEqual(
+            self.summary(strconv.infer_series(values, vectorize=True)),
+            self.summary(strconv.infer_series(values, vectorize=False)))
+
+    def test_infer_matrix(self):
+        rows = [self.values, list(reversed(self.values))]
+        c0 = strconv.infer_matrix(rows, vectorize=True)
+        c1 = strconv.infer_matrix(rows, vectorize=False)
+        self.assertEqual([self.summary(c) for c in c0],
+                         [self.summary(c) for c in c1])
+
+    def test_convert_series(self):
+        values = [v for v in self.values if v != 'nan']
+        self.assertEqual(
+            list(strconv.convert_series(values, include_type=True,
+                                        vectorize=True)),
+            list(strconv.convert_series(values, include_type=True,
+                                        vectorize=False)))
+
+    def test_separators(self):
+        # int and float do not strip the information separators
+        values = ['31\x1c', '1\x1d', '\x1e2.5', '3\x1f', '\x1c\x1c', ' 4 ']
+        self.assertEqual(
+            list(strconv.convert_series(values, include_type=True,
+                                        vectorize=True)),
+            list(strconv.convert_series(values, include_type=True,
+                                        vectorize=False)))
+        self.assertEqual(
+            self.summary(strconv.infer_series(values * 3, vectorize=True)),
+            self.summary(strconv.infer_series(values * 3, vectorize=False)))
+
+
+class BytesTestCase(unittest.TestCase):
+    def test_convert_bytes(self):
+        self.assertEqual(strconv.convert(b'12', include_type=True),
+                         (12, 'int'))
+        self.assertEqual(strconv.convert(memoryview(b' -1.5 ')), -1.5)
+        self.assertEqual(strconv.convert(bytearray(b'')), None)
+        self.assertEqual(strconv.convert(b'true'), True)
+        self.assertEqual(strconv.convert(b'caf\xc3\xa9'), 'caf\xe9')
+
+    def test_convert_column(self):
+        c0 = strconv.convert_column([b'1', b'2', b''], use_numpy=False)
+        self.assertEqual((c0.type, c0.tolist(), c0.errors),
+                         ('int', [1, 2, None], []))
+        c1 = strconv.convert_column([b'1', memoryview(b'2'), b'None'],
+                                    type='int', use_numpy=False)
+        self.assertEqual((c1.tolist(), c1.errors), ([1, 2, None], []))
+        c2 = strconv.convert_column([b'2013-03-01', b''], use_numpy=False)
+        self.assertEqual(c2.tolist(), [date(2013, 3, 1), None])
+        c3 = strconv.convert_column([b'a', b'b'], use_numpy=False)
+        self.assertEqual(c3.tolist(), ['a', 'b'])
+
+    def test_separators(self):
+        # int and float do not strip the information separators
+        for b in (b'1\x1c', b'1.5\x1f', b'\x1d2'):
+            self.assertEqual(strconv.convert(b, include_type=True),
+                             strconv.convert(b.decode(), include_type=True))
+        with tempfile.NamedTemporaryFile('wb', delete=False) as f:
+            f.write(b'1\x1c,1.5\x1f\n2,3.5\n')
+        self.addCleanup(os.remove, f.name)
+        _, (c0, c1) = strconv.infer_file(f.name)
+        self.assertEqual(c0.types['int'].count, 1)
+        self.assertEqual(c1.types['float'].count, 1)
+
+    def test_infer_file(self):
+        rows = [['1', '2.5', 'x'], ['', 'None', '3'], ['4', '1e3', 'true']]
+        with tempfile.NamedTemporaryFile('w', delete=False) as f:
+            f.write('a\tb\tc\r\n')
+            f.write('\n'.join('\t'.join(row) for row in rows))
+        self.addCleanup(os.remove, f.name)
+
+        header, types = strconv.infer_file(f.name, delimiter='\t',
+                                           header=True)
+        self.assertEqual(header, ['a', 'b', 'c'])
+        expected = strconv.infer_matrix(rows)
+        for info, other in zip(types, expected):
+            self.assertEqual(info.most_common(), other.most_common())
+            for t in info.types:
+                self.assertEqual(info.types[t].sample,
+                                 other.types[t].sample)
+        self.assertEqual(types[0].total, 3)
+
+        self.assertEqual(strconv.infer_file(f.name, n=1)[1][0].total, 1)
+
+    def test_empty_file(self):
+        with tempfile.NamedTemporaryFile(delete=False) as f:
+            pass
+        self.addCleanup(os.remove, f.name)
+        self.assertEqual(strconv.infer_file(f.name), (None, []))
+
+
+class CSVTestCase(unittest.TestCase):
+    data = 'a,b,c\n1,x,2013-03-01\n2,y,\n3.5,z,2013-03-02\n'
+
+    def test_convert_csv(self):
+        stream = strconv.convert_csv(io.StringIO(self.data), chunk_size=2)
+        self.assertEqual(list(stream), [
+            (1, 'x', date(2013, 3, 1)),
+            (2, 'y', None),
+            (3.5, 'z', date(2013, 3, 2)),
+        ])
+        self.assertEqual(stream.header, ['a', 'b', 'c'])
+        self.assertEqual(stream.total, 3)
+        self.assertEqual(stream.types[0].inferred_col_type(), [('float', 1)])
+        self.assertEqual(stream.types[2].most_common(),
+                         [('date', 2), ('none', 1)])
+        self.assertEqual(stream.changes, [(1, 0, 'int', 'float')])
+
+    def test_type_change(self):
+        data = 'a,b\n1.5,1\n2.5,2\n3,3.5\n4,x\n'
+        stream = strconv.convert_csv(io.StringIO(data), chunk_size=3,
+                                     include_type=True)
+        (first, raw), (second, _) = list(stream.chunks(raw=True))
+        self.assertEqual(raw, [['1.5', '1'], ['2.5', '2']])
+        # Cells are converted by the column's type, not the first match
+        self.assertEqual(second[0][0], (3.0, 'float'))
+        self.assertEqual(stream.changes, [(2, 1, 'int', 'float')])
+        self.assertEqual(second[0][1], (3.5, 'float'))
+        self.assertEqual(second[1], ((4.0, 'float'), ('x', None)))
+        self.assertEqual(stream.retype(first, raw, 0), [
+            ((1.5, 'float'), (1.0, 'float')),
+            ((2.5, 'float'), (2.0, 'float')),
+        ])
+        self.assertEqual(stream.retype(second, _, 2), second)
+
+        # Cells are converted again from their source text
+        data = '007,2013-03-01\n1.50,2013-03-02\nx,2013-03-03 10:00\n' \
+            'y,2013-03-04 11:00\nz,2013-03-05 12:00\n'
+        stream = strconv.convert_csv(io.StringIO(data), header=False,
+                                     chunk_size=2)
+        (first, raw), _, _ = list(stream.chunks(raw=True))
+        self.assertEqual(first, [(7, date(2013, 3, 1)),
+                                 (1.5, date(2013, 3, 2))])
+        self.assertEqual(stream.retype(first, raw, 0), [
+            ('007', datetime(2013, 3, 1)), ('1.50', datetime(2013, 3, 2))])
+
+    def test_infer_csv(self):
+        header, (c0, c1, c2) = strconv.infer_csv(io.StringIO(self.data))
+        self.assertEqual(header, ['a', 'b', 'c'])
+        self.assertEqual(c0.most_common(), [('int', 2), ('float', 1)])
+        self.assertEqual(c0.types['int'].sample, [(0, '1'), (1, '2')])
+        self.assertEqual(c1.types['string'].freq(), 1.0)
+
+        header, types = strconv.infer_csv(io.StringIO(self.data), n=1)
+        self.assertEqual(types[0].total, 1)
+
+        header, types = strconv.infer_csv(io.StringIO(self.data),
+                                          header=False)
+        self.assertEqual(header, None)
+        self.assertEqual(types[0].total, 4)
+
+    def test_path(self):
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        self.addCleanup(os.remove, path)
+        with os.fdopen(fd, 'w') as f:
+            f.write('1;2\n3;4\n')
+        header, types = strconv.infer_csv(path, delimiter=';')
+        self.assertEqual(header, None)
+        self.assertEqual(types[1].most_common(), [('int', 2)])
+
+
+async def _alines(lines):
+    for line in lines:
+        await asyncio.sleep(0)
+        yield line
+
+
+class AsyncTestCase(unittest.TestCase):
+    values = ['1', '2.5', 'true', '', '2013-03-01', 'x'] * 50
+
+    def test_aconvert_series(self):
+        async def run():
+            lines = [v.encode('utf-8') + b'\r\n' for v in self.values]
+            return [v async for v in strconv.aconvert_series(
+                _alines(lines), include_type=True)]
+
+        self.assertEqual(asyncio.run(run()),
+                         list(strconv.convert_series(self.values,
+                                                     include_type=True)))
+
+    def test_batches(self):
+        async def run():
+            return [b async for b in strconv.aconvert_series(
+                _alines(self.values[:10]), batches=True, chunk_size=4)]
+
+        self.assertEqual([len(b) for b in asyncio.run(run())], [4, 4, 2])
+
+    def test_ainfer_series(self):
+        async def run(n=None):
+            return await strconv.ainfer_series(_alines(self.values), n=n,
+                                               chunk_size=7)
+
+        info = asyncio.run(run())
+        expected = strconv.infer_series(self.values)
+        self.assertEqual(info.most_common(), expected.most_common())
+        self.assertEqual(info.types['int'].sample,
+                         expected.types['int'].sample)
+        self.assertEqual(asyncio.run(run(3)).total, 3)
+
+    def test_chunk_sizer(self):
+        sizer = strconv.ChunkSizer(100, target=0.01, maximum=150)
+        sizer.update(100, 10 ** 6)
+        self.assertEqual(sizer.size, 150)
+        sizer.update(150, 10 ** 9)
+        self.assertEqual(sizer.size, 75)
+
+
+class SamplingTestCase(unittest.TestCase):
+    def test_patience(self):
+        stop = strconv.EarlyStop(patience=3)
+        values = ['1', '', '2', '0.5', '3', '4', '5', '6', 'a']
+        info = strconv.infer_series(values, stop=stop)
+        self.assertEqual(info.total, 7)
+        self.assertEqual(info.most_common(),
+                         [('int', 5), ('none', 1), ('float', 1)])
+
+    def test_confidence(self):
+        stop = strconv.EarlyStop(confidence=0.95, margin=0.05)
+        info = strconv.infer_series(iter(lambda: '1', None), stop=stop)
+        self.assertTrue(0 < info.total < 100)
+        self.assertEqual(info.inferred_col_type(), [('int', info.total)])
+        self.assertRaises(ValueError, strconv.EarlyStop)
+        self.assertRaises(ValueError, strconv.EarlyStop, confidence=2)
+
+    def test_infer_matrix(self):
+        stop = strconv.EarlyStop(patience=2)
+        rows = [['1', 'a'], ['2', '1'], ['3', 'b'], ['4', 't'], ['x', 'c']]
+        c0, c1 = strconv.infer_matrix(rows, stop=stop)
+        self.assertEqual(c0.total, 3)
+        self.assertEqual(c0.most_common(), [('int', 3)])
+        self.assertEqual(c1.total, 5)
+        self.assertEqual(c1.types['bool'].sample, [(3, 't')])
+
+    def test_reservoir(self):
+        values = [str(i) for i in range(1000)]
+        info = strconv.infer_series(values, reservoir=10, seed=1)
+        self.assertEqual(info.total, 10)
+        sample = info.types['int'].sample
+        self.assertEqual(sample, sorted(sample))
+        self.assertEqual(
+            strconv.infer_series(iter(values), reservoir=10, seed=1).total,
+            10)
+        self.assertEqual(
+            strconv.infer_series(iter(values), n=5, reservoir=10).total, 5)
+
+        rows = [[str(i), 'a'] for i in range(100)]
+        c0, c1 = strconv.infer_matrix(rows, reservoir=7, seed=2)
+        self.assertEqual(c0.types['int'].count, 7)
+        self.assertEqual(c1.types['string'].freq(), 1.0)
+
+
+class ParallelTestCase(unittest.TestCase):
+    rows = [['1', 'a', None], ['2.5', 'b', '1'], ['3', 'a', 'x'],
+            ['t', 'c', '2'], ['', 'd', '3']] * 3
+
+    def summary(self, infos):
+        return [([(t, i.count, i.sample, i.total)
+                  for t, i in info.types.items()], info.total)
+                for info in infos]
+
+    def test_merge(self):
+        c0 = strconv.infer_series(['1', '2', 'a'], size=3)
+        c1 = strconv.infer_series(['2', '3', '4', '0.5'], size=3)
+        c0.merge(c1)
+        self.assertEqual(c0.total, 7)
+        self.assertEqual(c0.types['int'].count, 5)
+        self.assertEqual(c0.types['int'].freq(), 5 / 7.)
+        self.assertEqual([v for _, v in c0.types['int'].sample],
+                         ['1', '2', '3'])
+        self.assertEqual(c0.types['float'].total, 7)
+
+    def test_executor(self):
+        with ThreadPoolExecutor(2) as executor:
+            infos = strconv.infer_matrix(self.rows, executor=executor,
+                                         chunk_size=4)
+        self.assertEqual(self.summary(infos),
+                         self.summary(strconv.infer_matrix(self.rows)))
+
+    def test_workers(self):
+        infos = strconv.infer_matrix(self.rows, n=7, workers=2, chunk_size=3)
+        self.assertEqual(self.summary(infos),
+                         self.summary(strconv.infer_matrix(self.rows, n=7)))
+        self.assertEqual(strconv.infer_matrix([], workers=2), [])
+
+    def test_worker_state(self):
+        s = strconv.Strconv(converters=strconv.default_strconv.converters
+                            .items(), adaptive=True, cache_size=10)
+        s.convert('03/01/2013')
+        state = pickle.loads(pickle.dumps(s._worker_state()))
+        self.assertNotIn(s, state)
+        other = strconv._from_state(state)
+        self.assertEqual(other.cache_info().currsize, 0)
+        self.assertEqual(other.formats['date'].order(),
+                         s.formats['date'].order())
+        self.assertEqual(other.convert('03/01/2013'), date(2013, 3, 1))
+
+    def test_max_pending(self):
+        class Task(object):
+            def __init__(self, executor, func, args):
+                self.executor = executor
+                self.func = func
+                self.args = args
+
+            def result(self):
+                self.executor.pending -= 1
+                return self.func(*self.args)
+
+            def cancel(self):
+                pass
+
+        class Executor(object):
+            # Runs tasks when their result is read
+            def __init__(self):
+                self.pending = self.most = 0
+
+            def submit(self, func, *args):
+                self.pending += 1
+                self.most = max(self.most, self.pending)
+                return Task(self, func, args)
+
+        executor = Executor()
+        infos = strconv.infer_matrix(self.rows, executor=executor,
+                                     chunk_size=2, max_pending=3)
+        self.assertEqual(executor.most, 3)
+        self.assertEqual(self.summary(infos),
+                         self.summary(strconv.infer_matrix(self.rows)))
+        with self.assertRaises(ValueError):
+            strconv.infer_matrix(self.rows, executor=executor, max_pending=0)
+
+
+class SharedTestCase(unittest.TestCase):
+    rows = [['1', '0.5', 'true', '2013-03-01 10:00:00', '2013-03-01',
+             '10:30', 'a', ''],
+            ['x', '', 'no', '2013-03-01T10:00:00Z', '1970-01-01',
+             '23:59:59', 'b', ''],
+            [str(2 ** 70), '3', 'F', '', '2013-03-02', '', '', None]]
+
+    def check(self, shared):
+        self.assertEqual(shared.types, ['int', 'float', 'bool', 'datetime',
+                                        'date', 'time', 'string', 'empty'])
+        self.assertEqual(shared.tolist(0), [1, None, None])
+        self.assertEqual(shared[0].errors, [1, 2])
+        self.assertEqual(shared.tolist(1), [0.5, None, 3.0])
+        self.assertEqual(shared.tolist(2), [True, False, False])
+        self.assertEqual(shared.tolist(3), [datetime(2013, 3, 1, 10),
+                                            datetime(2013, 3, 1, 10), None])
+        self.assertEqual(shared.tolist(4), [date(2013, 3, 1),
+                                            date(1970, 1, 1),
+                                            date(2013, 3, 2)])
+        self.assertEqual(shared.tolist(5), [time(10, 30), time(23, 59, 59),
+                                            None])
+        self.assertEqual(shared.tolist(6), ['a', 'b', None])
+        self.assertEqual(shared.tolist(7), [None, None, None])
+
+    def test_views(self):
+        shared = strconv.convert_matrix_shared(self.rows, use_numpy=False)
+        try:
+            self.check(shared)
+            self.assertIsInstance(shared[0].values, memoryview)
+            self.assertEqual(shared[4].values.tolist()[1], 0)
+            self.assertEqual(shared[1].nulls.tolist(), [0, 1, 0])
+        finally:
+            shared.close()
+            shared.unlink()
+
+    @unittest.skipUnless(numpy, 'numpy is not installed')
+    def test_numpy(self):
+        with strconv.convert_matrix_shared(self.rows) as shared:
+            self.check(shared)
+            self.assertEqual(shared[0].values.dtype, numpy.int64)
+            self.assertEqual(shared[2].values.dtype, bool)
+            self.assertEqual(shared[1].nulls.tolist(), [False, True, False])
+
+    def test_workers(self):
+        types = strconv.infer_matrix(self.rows)
+        with ThreadPoolExecutor(2) as executor:
+            with strconv.convert_matrix_shared(self.rows, types,
+                                               executor=executor,
+                                               chunk_size=1) as shared:
+                self.check(shared)
+        rows = [[str(i), str(i / 4)] for i in range(100)]
+        with strconv.convert_matrix_shared(rows, workers=2,
+                                           chunk_size=30) as shared:
+            self.assertEqual(shared.tolist(0), list(range(100)))
+            self.assertEqual(shared.tolist(1)[-1], 24.75)
+
+
+class ShapeTestCase(unittest.TestCase):
+    rows = [['1', '2.5', 'a', ''], ['22', '3.5', 'b', '7'],
+            ['3', '4.5', '2013-03-01', None], ['44', '1e3', 'c', 'x'],
+            ['1', '2.5', 'a', '']] * 3
+
+    def infer_cells(self, rows, size):
+        infos = [strconv.Types(size=size) for _ in rows[0]]
+        for i, row in enumerate(rows):
+            for j, value in enumerate(row):
+                t = strconv.infer(value)
+                infos[j].incr(t)
+                infos[j].add(t, i, value)
+        return infos
+
+    def test_same_results(self):
+        for size in (0, 2, None):
+            types = strconv.infer_matrix(self.rows, size=size,
+                                         vectorize=False)
+            for info, other in zip(types, self.infer_cells(self.rows, size)):
+                self.assertEqual(list(info.types), list(other.types))
+                for t in info.types:
+                    self.assertEqual(info.types[t].count,
+                                     other.types[t].count)
+                    self.assertEqual(info.types[t].sample,
+                                     other.types[t].sample)
+
+    def test_shape_type(self):
+        cache = {}
+        self.assertEqual(strconv._shape_type('00', cache, 4), 'int')
+        self.assertEqual(strconv._shape_type('0.0', cache, 4), 'float')
+        self.assertEqual(strconv._shape_type('0.0', {}, 2), None)
+        self.assertEqual(strconv._shape_type('0000-00-00', cache, 4), None)
+        self.assertEqual(strconv._shape_type('', cache, 1), 'none')
+        self.assertEqual(cache['00'], 'int')
+
+
 class InferTestCase(unittest.TestCase):
     def test_infer(self):
         self.assertEqual(strconv.infer(''), 'none')
@@ -153,6 +993,344 @@ class InferTestCase(unittest.TestCase):
         self.assertEqual(c4.most_common(), [('none', 1)])
 
 
+class LatticeTestCase(unittest.TestCase):
+    def test_join(self):
+        join = strconv.join_types
+        self.assertEqual(join('int', 'float'), 'float')
+        self.assertEqual(join('bool', 'float'), 'float')
+        self.assertEqual(join('none', 'int'), 'int')
+        self.assertEqual(join('date', 'datetime'), 'datetime')
+        self.assertEqual(join('int', 'date'), 'string')
+        self.assertEqual(join('time', 'datetime'), 'string')
+        self.assertEqual(join('number', 'int'), 'string')
+
+        strconv.TYPE_PARENTS['number'] = 'float'
+        try:
+            self.assertEqual(join('number', 'int'), 'float')
+        finally:
+            del strconv.TYPE_PARENTS['number']
+
+    def test_lattice_changes(self):
+        s = strconv.default_strconv.copy()
+        s.register_converter('number', strconv.NumberConverter(strict=True),
+                             priority=0)
+        values = ['nan', '2', '3']
+        info = s.infer_series(values, widen=True)
+        self.assertEqual(info.widest, 'string')
+        self.assertEqual(info.most_common(), [('number', 2), ('float', 1)])
+        # Edits to the lattice apply to the next call
+        strconv.TYPE_PARENTS['number'] = 'float'
+        try:
+            info = s.infer_series(values, widen=True)
+            self.assertEqual(info.widest, 'float')
+            self.assertEqual(info.most_common(), [('float', 3)])
+        finally:
+            del strconv.TYPE_PARENTS['number']
+
+    def test_widest(self):
+        info = strconv.infer_series(['1', '', '2', '0.5', '3'])
+        self.assertEqual(info.widest, 'float')
+        self.assertEqual(info.inferred_col_type(), [('float', 1)])
+
+        info = strconv.infer_series(['1', '2', '2013-03-01'])
+        self.assertEqual(info.widest, 'string')
+        self.assertEqual(info.inferred_col_type(), [('string', 3)])
+
+        # Unparsed strings widen to string, unless treated as outliers
+        info = strconv.infer_series(['2013-03-01', 'x', '2013-03-02 10:00'])
+        self.assertEqual(info.widest, 'string')
+        self.assertEqual(info.inferred_col_type(), [('string', 3)])
+        self.assertEqual(info.inferred_col_type(outliers=True),
+                         [('datetime', 1)])
+        info = strconv.infer_series(['x', '1'])
+        self.assertEqual(info.inferred_col_type(), [('string', 2)])
+        self.assertEqual(info.inferred_col_type(outliers=True), [('int', 1)])
+        info = strconv.infer_series(['x', 'y', '1'])
+        self.assertEqual(info.inferred_col_type(outliers=True),
+                         [('string', 3)])
+        self.assertIsNone(strconv.Types().widest)
+
+    def test_merge(self):
+        c0 = strconv.infer_series(['t', 'f'])
+        c1 = strconv.infer_series(['1', ''])
+        self.assertEqual(c0.widest, 'bool')
+        c0.merge(c1)
+        self.assertEqual(c0.widest, 'int')
+        self.assertEqual(strconv.Types.from_dict(c0.to_dict()).widest, 'int')
+
+    def test_widen(self):
+        values = ['0.5', '1', '', '2', '2013-03-01', 'x', '3'] * 200
+        info = strconv.infer_series(values, vectorize=False, widen=True)
+        self.assertEqual(info.widest, 'string')
+        self.assertEqual(info.types['none'].count, 200)
+        # Values are still classified after the column became a string
+        self.assertEqual(info.most_common(),
+                         [('int', 598), ('float', 202), ('none', 200),
+                          ('date', 200), ('string', 200)])
+
+        values = ['0.5'] + ['1', 't'] * 100
+        info = strconv.infer_series(values, widen=True)
+        self.assertEqual(info.most_common(), [('float', 101), ('bool', 100)])
+        self.assertEqual(info.inferred_col_type(), [('float', 101)])
+        self.assertEqual(strconv.infer_series(values).inferred_col_type(),
+                         [('float', 1)])
+
+        rows = [['0.5', 'a'], ['1', '2'], ['t', 'Mar 3']]
+        self.assertEqual(
+            [c.inferred_col_type() for c in strconv.infer_matrix(
+                rows, widen=True)],
+            [[('float', 1)], [('string', 3)]])
+
+    def test_widen_outliers(self):
+        info = strconv.infer_series(['hello', 't', 'f', 't'], widen=True)
+        self.assertEqual(info.inferred_col_type(outliers=True),
+                         [('bool', 3)])
+        rows = [['hello', '1', 'x'], ['t', '2.5', '2013-03-01'],
+                ['f', 'y', '2013-03-02'], ['t', '3', '10:30']] * 5
+        self.assertEqual(
+            strconv.compile_plan(strconv.infer_matrix(rows, widen=True))
+            .types,
+            strconv.compile_plan(strconv.infer_matrix(rows)).types)
+
+
+class NumberConverterTestCase(unittest.TestCase):
+    def test_default(self):
+        n = strconv.NumberConverter()
+        self.assertEqual(n('1,234'), 1234)
+        self.assertEqual(n(' -1,234.50 '), -1234.5)
+        self.assertEqual(n('(12.50)'), -12.5)
+        self.assertEqual(n('12.5%'), 0.125)
+        self.assertEqual(n('1_000'), 1000)
+        self.assertEqual(n('1e3'), 1000.0)
+        for v in ('1,23', '12,34.5', '(-1)', 'abc', '', '1.2.3'):
+            self.assertRaises(ValueError, n, v)
+
+    def test_locale(self):
+        n = strconv.NumberConverter(thousands='.', decimal=',')
+        self.assertEqual(n('1.234.567'), 1234567)
+        self.assertEqual(n('1.234,5'), 1234.5)
+        self.assertRaises(ValueError, n, '1,234.5')
+        n = strconv.NumberConverter(thousands=' ', decimal=',')
+        self.assertEqual(n('1 234,5'), 1234.5)
+        self.assertRaises(ValueError, strconv.NumberConverter,
+                          thousands=',', decimal=',')
+
+    def test_strict_and_kind(self):
+        n = strconv.NumberConverter(strict=True)
+        for v in ('1_000', 'nan', 'inf'):
+            self.assertRaises(ValueError, n, v)
+        n = strconv.NumberConverter(kind='int')
+        self.assertEqual(n('(1,000)'), -1000)
+        self.assertRaises(ValueError, n, '1.5')
+        self.assertRaises(ValueError, n, '5%')
+        self.assertEqual(strconv.NumberConverter(kind='float')('1'), 1.0)
+
+    def test_register(self):
+        s = strconv.Strconv(prescreen=True)
+        s.register_converter('int', strconv.convert_int)
+        s.register_converter('number', strconv.NumberConverter())
+        self.assertEqual(s.convert('1,234', include_type=True),
+                         (1234, 'number'))
+        self.assertEqual(s.convert('(3.5)'), -3.5)
+        self.assertEqual(s.candidates('hello/'), ('int',))
+        self.assertEqual(s.candidates('12'), ('int', 'number'))
+
+    def test_default_strconv(self):
+        s = strconv.default_strconv.copy()
+        s.register_converter('number', strconv.NumberConverter(
+            thousands='.', decimal=','), priority=4)
+        self.assertEqual(s._builtin_prefix(), 4)
+        self.assertEqual(s.convert('1.234,5', include_type=True),
+                         (1234.5, 'number'))
+        self.assertEqual(s.convert('1.5', include_type=True), (1.5, 'float'))
+        self.assertEqual(s.convert('2013-03-01'), date(2013, 3, 1))
+        s.register_converter('number', strconv.NumberConverter(), priority=4)
+        self.assertEqual(s.convert('1,234', include_type=True),
+                         (1234, 'number'))
+
+    def test_may_match(self):
+        class Number(strconv.NumberConverter):
+            calls = 0
+
+            def try_convert(self, s):
+                self.calls += 1
+                return super().try_convert(s)
+
+        n = Number()
+        s = strconv.Strconv(prescreen=True)
+        s.register_converter('number', n)
+        for v in ('hello', 'hell', 'e', 'nans', 'Inf-x'):
+            self.assertEqual(s.candidates(v), ())
+            self.assertEqual(s.convert(v), v)
+        self.assertEqual(n.calls, 0)
+        for v in ('nan', '-inf', 'Infinity%', ' nan ', '1e3', '1E-3'):
+            self.assertEqual(s.candidates(v), ('number',))
+        self.assertEqual(s.convert('-inf'), float('-inf'))
+        self.assertEqual(n.calls, 1)
+        strict = strconv.NumberConverter(strict=True)
+        self.assertFalse(strict.may_match(strconv.classify('nan'), 3))
+        self.assertTrue(strict.may_match(strconv.classify('1e3'), 3))
+
+
+class VocabularyTestCase(unittest.TestCase):
+    def test_lookup(self):
+        v = strconv.Vocabulary.nulls()
+        self.assertIsNone(v('NULL'))
+        self.assertIsNone(v('n/A'))
+        self.assertIsNone(v('\\N'))
+        self.assertIs(v.try_convert('nullish'), strconv.NOMATCH)
+        self.assertRaises(ValueError, v, 'x')
+        self.assertIn('Nil', v)
+        self.assertRaises(ValueError, strconv.Vocabulary,
+                          {'yes': True, 'YES': False})
+
+    def test_booleans(self):
+        v = strconv.Vocabulary.booleans(('en', 'de', 'pt'), digits=True)
+        self.assertIs(v('Ja'), True)
+        self.assertIs(v('NÃO'), False)
+        self.assertIs(v('off'), False)
+        self.assertIs(v('1'), True)
+        self.assertIs(v.try_convert('oui'), strconv.NOMATCH)
+        self.assertRaises(KeyError, strconv.Vocabulary.booleans, ('xx',))
+
+    def test_install(self):
+        s = strconv.default_strconv.copy()
+        s.install_vocabulary('null', strconv.Vocabulary.nulls(
+            ('null', 'n/a')), priority=0)
+        # Numbers are still decided in bulk
+        self.assertEqual(s._builtin_prefix(), 4)
+        self.assertEqual(s.convert('N/A', include_type=True), (None, 'none'))
+        self.assertEqual(s.convert('', include_type=True), (None, 'none'))
+        self.assertEqual(s.convert('nan', include_type=True)[1], 'float')
+        self.assertNotIn('null', s.converters)
+        values = ['1', 'NULL', '2.5', '', 'n/a'] * 10
+        self.assertEqual(s.infer_series(values).types.keys(),
+                         {'int', 'float', 'none'})
+
+        # "nan" has to be checked before float
+        s.install_vocabulary('null', {'nan': None, 'null': None}, priority=0)
+        self.assertEqual(s._builtin_prefix(), 2)
+        self.assertEqual(s.convert('NaN', include_type=True), (None, 'none'))
+        self.assertEqual(s.convert('N/A'), 'N/A')
+        s.install_vocabulary('flag', strconv.Vocabulary.booleans(
+            digits=True), priority=1)
+        self.assertEqual(s._builtin_prefix(), 1)
+        self.assertEqual(list(s.convert_series(['1', 'y'],
+                                               include_type=True)),
+                         [(True, 'flag'), (True, 'flag')])
+
+    def test_nulls(self):
+        s = strconv.default_strconv.copy()
+        s.install_vocabulary('null', strconv.Vocabulary.nulls())
+        self.assertEqual(s.infer_series(['1', '2', 'NULL', '3', 'N/A'])
+                         .inferred_col_type(), [('int', 3)])
+        info = s.infer_series(['1', 'NULL'])
+        self.assertEqual(info.most_common(), [('int', 1), ('none', 1)])
+        self.assertEqual(s.convert_column(['1', 'NULL'],
+                                          use_numpy=False).tolist(),
+                         [1, None])
+        plan = s.compile_plan(s.infer_matrix([['1'], ['NULL']]))
+        self.assertEqual(plan.types, ('int',))
+        self.assertEqual(list(plan.convert([['1'], ['NULL'], ['']])),
+                         [(1,), (None,), (None,)])
+        self.assertEqual(s.convert(None, include_type=True), (None, 'none'))
+
+    def test_bool_tokens(self):
+        for s in ('t', 'TRUE', 'Yes', 'true\n'):
+            self.assertIs(strconv.convert_bool(s), True)
+        for s in ('F', 'false', 'NO', 'no\n'):
+            self.assertIs(strconv.convert_bool(s), False)
+        for s in ('y', 'true\n\n', ' true', 'truee', 'on'):
+            self.assertRaises(ValueError, strconv.convert_bool, s)
+        self.assertTrue(strconv.true_re.match('True'))
+
+
+class ISOTestCase(unittest.TestCase):
+    def test_iso_datetime(self):
+        self.assertEqual(strconv.convert_iso_datetime('2013-03-01T17:40'),
+                         datetime(2013, 3, 1, 17, 40))
+        self.assertEqual(
+            strconv.convert('2013-03-01 17:40:00.5+05:30',
+                            include_type=True),
+            (datetime(2013, 3, 1, 17, 40, 0, 500000, tzoffset(None, 19800)),
+             'datetime'))
+        self.assertEqual(strconv.convert('2013-03-01T17:40:00Z'),
+                         datetime(2013, 3, 1, 17, 40, tzinfo=timezone.utc))
+        for v in ('2013-02-30T10:00', '2013-03-01T25:00', '2013-03-01'):
+            self.assertIs(strconv.try_iso_datetime(v), strconv.NOMATCH)
+
+    def test_iso_date(self):
+        self.assertEqual(strconv.convert_iso_date('2013-03-01'),
+                         date(2013, 3, 1))
+        self.assertEqual(strconv.convert('2013-03-01', include_type=True),
+                         (date(2013, 3, 1), 'date'))
+        self.assertRaises(ValueError, strconv.convert_iso_date, '2013-3-1')
+
+    def test_fallback(self):
+        # Strings outside the ISO subset still go through the formats
+        self.assertEqual(strconv.convert('2013-03-01 5:30:40 -0500'),
+                         datetime(2013, 3, 1, 5, 30, 40,
+                                  tzinfo=tzoffset(None, -18000)))
+        self.assertEqual(strconv.convert('2013-3-1 17:40'),
+                         datetime(2013, 3, 1, 17, 40))
+
+
+class ImportTestCase(unittest.TestCase):
+    def test_lazy_imports(self):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        out = subprocess.check_output([
+            sys.executable, '-c',
+            'import sys, strconv; '
+            'print("dateutil" in sys.modules, strconv._bool_res); '
+            'strconv.convert_date("Mar 1, 2013"); '
+            'print("dateutil" in sys.modules)'], cwd=root)
+        self.assertEqual(out.split(), [b'False', b'None', b'True'])
+
+    def test_lazy_attributes(self):
+        self.assertTrue(strconv.true_re.match('Yes'))
+        self.assertTrue(strconv.false_re.match('f'))
+        self.assertIsNotNone(strconv.duparse)
+        self.assertRaises(AttributeError, getattr, strconv, 'missing')
+
+
+class NoMatchTestCase(unittest.TestCase):
+    def test_try_converters(self):
+        self.assertIs(strconv.try_int('1.5'), strconv.NOMATCH)
+        self.assertEqual(strconv.try_int(' 12 '), 12)
+        self.assertIs(strconv.try_float('abc'), strconv.NOMATCH)
+        self.assertEqual(strconv.try_float('1e3'), 1000.0)
+        self.assertIsNone(strconv.try_none(''))
+        self.assertIs(strconv.try_bool('maybe'), strconv.NOMATCH)
+        self.assertIs(strconv.try_time('25:00'), strconv.NOMATCH)
+        self.assertEqual(strconv.try_datetime('2013-03-01 5:40 PM'),
+                         datetime(2013, 3, 1, 17, 40))
+        self.assertIs(strconv.try_date('nope'), strconv.NOMATCH)
+        self.assertIs(strconv.convert_time.try_convert, strconv.try_time)
+        self.assertFalse(strconv.NOMATCH)
+
+    def test_raising_adapter(self):
+        def convert_hex(s):
+            return int(s, 16)
+
+        s = strconv.Strconv()
+        s.register_converter('hex', convert_hex)
+        self.assertEqual(s.convert('ff'), 255)
+        self.assertEqual(s.convert('zz'), 'zz')
+        self.assertIs(s.get_converter('hex'), convert_hex)
+        self.assertEqual(s.copy().convert('0a'), 10)
+
+    def test_non_raising(self):
+        def try_upper(s):
+            return s if s.isupper() else strconv.NOMATCH
+
+        s = strconv.Strconv()
+        s.register_converter('upper', try_upper, raises=False)
+        self.assertEqual(s.convert('ABC', include_type=True),
+                         ('ABC', 'upper'))
+        self.assertEqual(s.copy().convert('abc', include_type=True),
+                         ('abc', None))
+
+
 class ConverterTestCase(unittest.TestCase):
     def test_convert_none(self):
         self.assertEqual(strconv.convert_none(''), None)
@@ -213,5 +1391,76 @@ class ConverterTestCase(unittest.TestCase):
                          datetime(2013, 3, 1, 5, 30, 40, tzinfo=tzoff))
 
 
+class FormatEngineTestCase(unittest.TestCase):
+    def test_match(self):
+        engine = strconv.compile_formats(strconv.TIME_FORMATS)
+        self.assertEqual(engine.match('15:30:40'), 0)
+        self.assertEqual(engine.match('5:30 PM'), 4)
+        self.assertEqual(engine.match('hello'), -1)
+        self.assertIs(strconv.compile_formats(strconv.TIME_FORMATS), engine)
+
+    def test_parse(self):
+        engine = strconv.compile_formats(strconv.CORE_DATE_FORMATS)
+        self.assertEqual(engine.parse('01-02-2013'),
+                         (datetime(2013, 2, 1), '%d-%m-%Y'))
+        # Pattern matches but strptime rejects the day
+        self.assertRaises(ValueError, engine.parse, '2013-02-30')
+        self.assertRaises(ValueError, engine.parse, 'foo')
+
+    def test_same_as_strptime(self):
+        formats = strconv.datetime_formats()
+        engine = strconv.compile_formats(formats)
+
+        def strptime(s):
+            for f in formats:
+                try:
+                    return datetime.strptime(s, f)
+                except ValueError:
+                    pass
+
+        for s in ('2013-03-01 5:30:40 -0500', 'Mar 1, 2013T5:30:40 AM',
+                  '01-02-13 01:02:03', '31.12.2022 23:59'):
+            self.assertEqual(engine.parse(s)[0], strptime(s))
+
+    def test_strptime_fallback(self):
+        # Without the internal patterns of _strptime every format is tried
+        formats = strconv.datetime_formats()
+        time_re = strconv.TimeRE
+        strconv.TimeRE = None
+        try:
+            fallback = strconv.FormatEngine(formats)
+        finally:
+            strconv.TimeRE = time_re
+        engine = strconv.compile_formats(formats)
+        self.assertEqual(fallback.match('hello'), 0)
+        for s in ('2013-03-01 5:30:40 -0500', '01-02-13 01:02:03',
+                  '2013-02-30 10:00', 'hello'):
+            self.assertEqual(fallback.lookup(s), engine.lookup(s))
+
+    def test_locale_change(self):
+        engine = strconv.FormatEngine(['%d %B %Y'])
+        plain = strconv.FormatEngine(['%Y-%m-%d'])
+        getlang = strconv._getlang
+        strconv._getlang = lambda: ('xx_XX', 'UTF-8')
+        try:
+            self.assertEqual(engine.match('1 March 2013'), 0)
+            self.assertEqual(plain.match('2013-03-01'), 0)
+        finally:
+            strconv._getlang = getlang
+        self.assertEqual(engine._lang, ('xx_XX', 'UTF-8'))
+        self.assertIsNone(plain._lang)
+        engine.match('1 March 2013')
+        self.assertEqual(engine._lang, getlang())
+
+    def test_dateutil_dates(self):
+        # Dates stay dates on Python 3.10+, whose version string compares
+        # as older than '3.5'
+        self.assertFalse(strconv._dateutil_datetimes)
+        self.assertEqual(strconv.convert('4\n,', include_type=True)[1],
+                         'date')
+        self.assertEqual(strconv.convert('Mar 3 2013', include_type=True),
+                         (date(2013, 3, 3), 'date'))
+
+
 if __name__ == '__main__':
     unittest.main()